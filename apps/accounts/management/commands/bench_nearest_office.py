@@ -0,0 +1,66 @@
+import random
+import timeit
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from geopy.distance import geodesic
+
+from apps.accounts.models import Office
+from core.utils.spatial import OfficeIndex
+
+
+def nearest_by_loop(offices, coords):
+    nearest = None
+    min_distance = float("inf")
+
+    for office in offices:
+        distance = geodesic(coords, (float(office.geo_lat), float(office.geo_lng))).km
+        if distance < min_distance:
+            min_distance = distance
+            nearest = office
+    return nearest
+
+
+def random_kenya_coords(rng):
+    return (rng.uniform(-4.6, 4.6), rng.uniform(33.9, 41.9))
+
+
+class Command(BaseCommand):
+    help = "Compare the geodesic loop with the office spatial index on synthetic offices."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000")
+        parser.add_argument("--lookups", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        lookups = options["lookups"]
+
+        self.stdout.write(f"{'offices':>8} {'loop ms/lookup':>16} {'index ms/lookup':>16} {'speedup':>9} {'worst tie gap':>14}")
+
+        for size in [int(s) for s in options["sizes"].split(",")]:
+            offices = []
+            for pk in range(size):
+                lat, lng = random_kenya_coords(rng)
+                offices.append(Office(id=pk, name=f"Office {pk}", geo_lat=Decimal(f"{lat:.6f}"), geo_lng=Decimal(f"{lng:.6f}")))
+
+            index = OfficeIndex(offices)
+            points = [random_kenya_coords(rng) for _ in range(lookups)]
+
+            # the index ranks on a sphere and the loop on the ellipsoid, so near-ties can differ
+            worst_gap_m = 0
+            for point in points:
+                expected = nearest_by_loop(offices, point)
+                found, _ = index.nearest(*point)
+                if expected.id != found.id:
+                    gap = geodesic(point, (float(found.geo_lat), float(found.geo_lng))).m - \
+                        geodesic(point, (float(expected.geo_lat), float(expected.geo_lng))).m
+                    worst_gap_m = max(worst_gap_m, gap)
+
+            loop_time = timeit.timeit(lambda: [nearest_by_loop(offices, p) for p in points], number=1)
+            index_time = timeit.timeit(lambda: [index.nearest(*p) for p in points], number=1)
+
+            self.stdout.write(
+                f"{size:>8} {loop_time * 1000 / lookups:>16.4f} {index_time * 1000 / lookups:>16.4f} "
+                f"{loop_time / index_time:>8.1f}x {worst_gap_m:>12.1f} m"
+            )
@@ -27,6 +27,12 @@ class IsPartnerPickup(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role == 'partner_shop'
     
 
+class IsBusinessOrPartner(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (request.user.account_type == 'business' or request.user.role == 'partner_shop')
+
+
+
 class IsVerifiedPartner(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.role in ['partner_rider', 'partner_shop'] and request.user.is_verified
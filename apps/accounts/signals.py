@@ -1,7 +1,9 @@
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_save
-from apps.accounts.models import User, PartnerProfile
+from django.db.models.signals import post_save, post_delete
+from apps.accounts.models import User, PartnerProfile, Office
 from apps.drivers.models import Wallet
+from core.utils.spatial import office_index
 
 @receiver(post_save, sender=User)
 def create_partner_profile(created, instance, **kwargs):
@@ -17,3 +19,6 @@ def create_partnerrider_wallet(created, instance, **kwargs):
 
 
 
+@receiver([post_save, post_delete], sender=Office)
+def rebuild_office_index(sender, instance, **kwargs):
+    transaction.on_commit(office_index.invalidate)
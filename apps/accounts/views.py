@@ -3,7 +3,6 @@ from django.db.models import Q
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes
-from django.core.mail import send_mail
 
 from rest_framework import generics, status
 from rest_framework.views import APIView
@@ -14,6 +13,7 @@ from apps.accounts.models import *
 from apps.accounts.serializers import *
 from apps.accounts.permissions import *
 from core.utils.emails import send_welcome_email
+from apps.messaging.mailer import queue_email
 # Create your views here.
 
 
@@ -83,12 +83,10 @@ class PasswordResetRequestView(APIView):
 
 
         reset_url = f"https://app.expa.co.ke/auth/reset-password?uid={uid}&token={token}" 
-        send_mail(
+        queue_email(
             "Password Reset",
-            f"Clivk the link to reset your password: {reset_url}",
-            "",
             [user.email],
-            fail_silently=False,
+            message=f"Clivk the link to reset your password: {reset_url}",
         )
         return Response({ "success": True, "message": "Password reset link sent."}, status=status.HTTP_200_OK)
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CorporateConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.corporate'
+
+
+    def ready(self):
+        import apps.corporate.signals
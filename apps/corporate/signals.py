@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from apps.corporate.models import CorporateRoute, CorporateRoutePricing
+from core.utils.ratecards import rate_cards
+
+
+@receiver([post_save, post_delete], sender=CorporateRoute)
+@receiver([post_save, post_delete], sender=CorporateRoutePricing)
+def rebuild_rate_cards(sender, instance, **kwargs):
+    transaction.on_commit(rate_cards.invalidate)
@@ -10,6 +10,7 @@ from apps.accounts.permissions import IsOwnerOrAdmin
 from apps.corporate.serializers import *
 from apps.corporate.models import *
 from core.utils.services import get_nearest_office
+from core.utils.ratecards import rate_cards
 
 
 # Create your views here.
@@ -38,22 +39,20 @@ class CalculatePriceView(APIView):
                 return Response({ "success": False, "message": "No corporate office linked"}, status=status.HTTP_400_BAD_REQUEST)
 
             origin_office = user.corporate_office
-            
-            try:
-                route = CorporateRoute.objects.filter(origin_office=origin_office.id, destination_office=destination_office.id).first()
-            except CorporateRoute.DoesNotExist:
+            rate_card = rate_cards.get()
+
+            route = rate_card.corporate_route(origin_office.id, destination_office.id)
+            if not route:
                 return Response({"success": False, "message": "No route found for offices"}, status=status.HTTP_404_NOT_FOUND)
             
-            tiers = CorporateRoutePricing.objects.filter(route=route.id).order_by("min_weight")
+            tier = rate_card.corporate_tier(route.id, weight)
             
             price = None
-            for tier in tiers:
-                if tier.min_weight <= weight <= tier.max_weight:
-                    if tier.price:
-                        price = weight * tier.price
-                    else:
-                        price = tier.price
-                    break
+            if tier:
+                if tier.price:
+                    price = weight * tier.price
+                else:
+                    price = tier.price
 
             if price is None:
                 return Response({ "success": False, "message": "No pricing tier matched"}, status=status.HTTP_400_BAD_REQUEST)
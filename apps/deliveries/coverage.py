@@ -0,0 +1,82 @@
+import math
+import numpy as np
+from django.conf import settings
+
+from apps.deliveries.models import IntraCityParcelPolicy
+from core.utils import geohash
+from core.utils.geo import distances_km
+from core.utils.indexes import VersionedIndex
+
+
+KM_PER_DEGREE = 111.32
+
+
+class ZoneCoverage:
+    """
+    Geohash cell -> intra-city policies whose zone touches the cell. A road
+    is never shorter than the straight line, so the map only narrows the
+    policies down and each candidate still gets the exact road check.
+
+    With a road_factor set, a cell all within radius_km / road_factor in a
+    straight line is interior and skips the road check. That changes what a
+    zone means: a point there is accepted even if its road distance is over
+    radius_km, so it is off unless INTRACITY_ROAD_FACTOR is set.
+    """
+
+    def __init__(self, policies, precision=None, road_factor=None):
+        self.precision = precision or settings.INTRACITY_COVERAGE_PRECISION
+        self.road_factor = settings.INTRACITY_ROAD_FACTOR if road_factor is None else road_factor
+
+        self.policies = [
+            policy for policy in policies
+            if policy.office and policy.office.geo_lat is not None and policy.office.geo_lng is not None
+        ]
+        self.cells = {}
+
+        for rank, policy in enumerate(self.policies):
+            for cell, interior in self.cover(policy):
+                self.cells.setdefault(cell, []).append((rank, interior))
+
+
+    def cover(self, policy):
+        lat, lng = float(policy.office.geo_lat), float(policy.office.geo_lng)
+        radius_km = float(policy.radius_km)
+        inner_km = radius_km / self.road_factor if self.road_factor else -1
+
+        cell_lat, cell_lng = geohash.cell_size(self.precision)
+        span_lat = radius_km / KM_PER_DEGREE
+        span_lng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+
+        # south-west corners of every cell in the zone's bounding box
+        rows = np.arange(math.floor((lat - span_lat + 90) / cell_lat), math.floor((lat + span_lat + 90) / cell_lat) + 1)
+        cols = np.arange(math.floor((lng - span_lng + 180) / cell_lng), math.floor((lng + span_lng + 180) / cell_lng) + 1)
+        south = (rows * cell_lat - 90)[:, None].repeat(len(cols), axis=1).ravel()
+        west = (cols * cell_lng - 180)[None, :].repeat(len(rows), axis=0).ravel()
+        north, east = south + cell_lat, west + cell_lng
+
+        closest = distances_km((lat, lng), np.column_stack([np.clip(lat, south, north), np.clip(lng, west, east)]))
+        farthest = np.max([
+            distances_km((lat, lng), np.column_stack(corner))
+            for corner in ((south, west), (south, east), (north, west), (north, east))
+        ], axis=0)
+
+        for i in np.flatnonzero(closest <= radius_km):
+            cell = geohash.encode(south[i] + cell_lat / 2, west[i] + cell_lng / 2, self.precision)
+            yield cell, bool(farthest[i] <= inner_km)
+
+
+    def candidates(self, *points):
+        """[(policy, interior)] for zones touching any of points, in policy order."""
+        found = {}
+        for lat, lng in points:
+            for rank, interior in self.cells.get(geohash.encode(float(lat), float(lng), self.precision), ()):
+                found[rank] = found.get(rank, False) or interior
+
+        return [(self.policies[rank], found[rank]) for rank in sorted(found)]
+
+
+
+intracity_coverage = VersionedIndex(
+    "intracity_coverage",
+    lambda: ZoneCoverage(IntraCityParcelPolicy.objects.select_related("office").order_by("id")),
+)
@@ -0,0 +1,114 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+
+from apps.accounts.models import User
+from apps.deliveries.models import Shipment
+from core.utils.services import get_nearby_positions
+
+
+# (radius_km, riders to notify) per round; later rounds reach further and wider
+ROUNDS = [(3, 5), (6, 10), (10, 20)]
+
+# a rider's shipments count as open until they reach one of these, as in the rider views
+CLOSED_SHIPMENT_STATUSES = ["delivered", "cancelled", "returned"]
+
+# score weights; lower scores are notified first
+DISTANCE_WEIGHT = 1.0
+LOAD_WEIGHT = 0.5
+IDLE_WEIGHT = 0.3
+STALENESS_WEIGHT = 0.4
+
+# idle time beyond this earns no extra priority
+IDLE_CAP_SECONDS = 2 * 60 * 60
+
+
+def get_round(round_number):
+    return ROUNDS[max(1, min(round_number, len(ROUNDS))) - 1]
+
+
+def contacted_key(package_id):
+    return f"dispatch:{package_id}:contacted"
+
+
+def get_contacted(package_id):
+    return set(cache.get(contacted_key(package_id)) or [])
+
+
+def add_contacted(package_id, driver_ids):
+    contacted = get_contacted(package_id) | {str(driver_id) for driver_id in driver_ids}
+    cache.set(contacted_key(package_id), list(contacted), settings.DISPATCH_CONTACTED_TTL_SECONDS)
+
+
+def score(distance_km, radius_km, open_shipments, idle_seconds, age_seconds, max_age_seconds):
+    """
+    Each term is scaled to roughly 0..1 so the weights compare like with
+    like: near, free, long-idle riders with a fresh position come first.
+    """
+    idle = min(idle_seconds, IDLE_CAP_SECONDS) / IDLE_CAP_SECONDS
+    return (
+        DISTANCE_WEIGHT * distance_km / radius_km
+        + LOAD_WEIGHT * open_shipments
+        - IDLE_WEIGHT * idle
+        + STALENESS_WEIGHT * min(age_seconds / max_age_seconds, 1)
+    )
+
+
+def rank_riders(pickup_coords, radius_km, exclude=()):
+    """Riders within radius_km, best first, as [(user, score)]. Two queries however many riders are nearby."""
+    exclude = set(exclude)
+    positions = [position for position in get_nearby_positions(pickup_coords, radius_km) if position[0] not in exclude]
+    if not positions:
+        return []
+
+    driver_ids = [driver_id for driver_id, _, _ in positions]
+    riders = {
+        str(user.id): user
+        for user in User.objects.filter(id__in=driver_ids, role__in=["driver", "partner_rider"], is_active=True)
+    }
+
+    shipments = (
+        Shipment.objects.filter(courier_id__in=riders)
+        .values("courier_id")
+        .annotate(
+            open_count=Count("id", filter=~Q(status__in=CLOSED_SHIPMENT_STATUSES)),
+            last_assigned=Max("assigned_at"),
+        )
+    )
+    open_counts, last_assigned = {}, {}
+    for row in shipments:
+        open_counts[str(row["courier_id"])] = row["open_count"]
+        last_assigned[str(row["courier_id"])] = row["last_assigned"]
+
+    now = time.time()
+    max_age = settings.DRIVER_POSITION_MAX_AGE_SECONDS
+    ranked = []
+    for driver_id, distance_km, last_seen in positions:
+        rider = riders.get(driver_id)
+        if rider is None:
+            continue
+
+        assigned_at = last_assigned.get(driver_id)
+        idle_seconds = now - assigned_at.timestamp() if assigned_at else IDLE_CAP_SECONDS
+        ranked.append((rider, score(
+            distance_km,
+            radius_km,
+            open_counts.get(driver_id, 0),
+            idle_seconds,
+            max(now - (last_seen or 0), 0),
+            max_age,
+        )))
+
+    ranked.sort(key=lambda item: item[1])
+    return ranked
+
+
+def select_riders(package_id, pickup_coords, round_number):
+    """The riders to notify this round: the best not yet contacted for this package."""
+    radius_km, limit = get_round(round_number)
+    ranked = rank_riders(pickup_coords, radius_km, exclude=get_contacted(package_id))
+    selected = [rider for rider, _ in ranked[:limit]]
+    if selected:
+        add_contacted(package_id, [rider.id for rider in selected])
+    return selected
@@ -15,6 +15,7 @@ from apps.deliveries.drivers.serializers import *
 from apps.messaging.models import Notification
 from apps.messaging.utils import *
 from apps.messaging.serializers import *
+from core.utils.public_ids import normalize, is_legacy, InvalidPublicID
 
 
 class DriverAssignedShipmentsView(generics.ListAPIView):
@@ -77,6 +78,18 @@ class DriverShipmentDetailView(generics.RetrieveUpdateAPIView):
 
 
 
+def get_scanned_shipment(shipment_id):
+    """Shipment by scanned or typed ID; raises InvalidPublicID when the ID is a mis-read."""
+    try:
+        return Shipment.objects.get(shipment_id=shipment_id)
+    except Shipment.DoesNotExist:
+        # older IDs carry no check character, so they can only be looked up as typed
+        if is_legacy(shipment_id, "MF"):
+            return Shipment.objects.get(shipment_id=str(shipment_id).strip().upper())
+        return Shipment.objects.get(shipment_id=normalize(shipment_id, "MF"))
+
+
+
 class UpdateShipmentStatusView(APIView):
     permission_classes = [ IsRider, IsAuthenticated ]
 
@@ -86,7 +99,7 @@ class UpdateShipmentStatusView(APIView):
         new_status = request.data.get("status")
 
         try:
-            shipment = Shipment.objects.get(shipment_id=shipment_id)
+            shipment = get_scanned_shipment(shipment_id)
 
             # check driver/rider is the assigned one
             if not shipment.stages.filter(driver=user).exists():
@@ -100,6 +113,7 @@ class UpdateShipmentStatusView(APIView):
             shipment_packages = ShipmentPackage.objects.filter(shipment=shipment).select_related("package")
 
 
+            notifications = []
             for item in shipment_packages:
                 package = item.package
 
@@ -133,19 +147,21 @@ class UpdateShipmentStatusView(APIView):
 
 
                 # send notification to sender & recipient
-                sender = package.created_by
-                if sender:
-                    send_notification(
-                        user=sender,
-                        title=f"Package {item.package.package_id} update",
-                        message=f"Your package is now {item.status}.",
-                    )
+                if package.created_by_id:
+                    notifications.append(notification(
+                        package.created_by_id,
+                        f"Package {item.package.package_id} update",
+                        f"Your package is now {item.status}.",
+                    ))
 
                     # TO-DO: send messages and emails to recipient 
 
+            fan_out(notifications)
             return Response({"success": True, "message": "Shipment and packages updated."}, status=200)
         except Shipment.DoesNotExist:
             return Response({ "success": False, "message": "Shipment not found."}, status=404)
+        except InvalidPublicID:
+            return Response({ "success": False, "message": "Shipment ID failed its check character, please rescan."}, status=400)
 
 
 
@@ -174,10 +190,12 @@ class ProofofDeliveryView(APIView):
     def post(self, request, id):
        
         try:
-            shipment = Shipment.objects.get(shipment_id=id)
+            shipment = get_scanned_shipment(id)
             print(shipment)
         except Shipment.DoesNotExist:
             return Response({ "success": False, "message": "Shipment not found."}, status=status.HTTP_404_NOT_FOUND)
+        except InvalidPublicID:
+            return Response({ "success": False, "message": "Shipment ID failed its check character, please rescan."}, status=status.HTTP_400_BAD_REQUEST)
         
 
         serializer = ProofOfDeliverySerializer(data=request.data)
@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.utils.text import slugify
+
+from apps.accounts.models import PartnerProfile
+from apps.deliveries.models import Package, package_numbers
+from apps.deliveries.serializers import PackageImportSerializer
+from apps.messaging.outbox import publish
+from core.utils.public_ids import bulk_create_with_public_ids
+from core.utils.spatial import get_nearest_offices
+
+
+class PackageImportError(Exception):
+    pass
+
+
+
+def read_rows(file, name=""):
+    """Rows from an uploaded CSV or JSON file, as a list of dicts."""
+    content = file.read()
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    if name.lower().endswith(".json") or content.lstrip().startswith(("[", "{")):
+        try:
+            rows = json.loads(content)
+        except ValueError as e:
+            raise PackageImportError(f"Invalid JSON: {e}")
+        if isinstance(rows, dict):
+            rows = rows.get("packages", [])
+        if not isinstance(rows, list):
+            raise PackageImportError("Expected a list of packages.")
+        return rows
+
+    # blank cells mean "not given", as a missing JSON key would
+    return [
+        {key.strip(): value for key, value in row.items() if key and value not in ("", None)}
+        for row in csv.DictReader(io.StringIO(content))
+    ]
+
+
+def import_defaults(user):
+    """
+    (defaults, overrides) for every row, matching the single-package
+    endpoints: partner shops send from their shop, corporate users default
+    to their corporate office.
+    """
+    if user.role == "partner_shop":
+        try:
+            profile = user.partner_profile
+        except PartnerProfile.DoesNotExist:
+            raise PackageImportError("Partner profile not found.")
+        return {}, {
+            "origin_office": profile.office,
+            "sender_address": profile.location,
+            "sender_latLng": profile.location_latLang,
+        }
+
+    office = user.corporate_office
+    if office:
+        return {
+            "sender_name": office.name,
+            "sender_phone": office.phone,
+            "sender_address": office.address,
+            "sender_latLng": office.lat_lng,
+        }, {}
+    return {}, {}
+
+
+def resolve_offices(packages):
+    """Nearest origin and destination offices for every package still missing one, in one pass each."""
+    for office_field, latlng_field in (("origin_office", "sender_latLng"), ("destination_office", "recipient_latLng")):
+        missing = [p for p in packages if not getattr(p, f"{office_field}_id")]
+        offices = get_nearest_offices([(getattr(p, latlng_field) or "").split(",") for p in missing])
+        for package, office in zip(missing, offices):
+            setattr(package, office_field, office)
+
+
+def import_packages(rows, user):
+    """
+    Validates every row, then writes them all with bulk_create. Returns
+    (packages, errors) with errors keyed by row number; nothing is written
+    when any row is invalid.
+    """
+    if len(rows) > settings.PACKAGE_IMPORT_MAX_ROWS:
+        raise PackageImportError(f"At most {settings.PACKAGE_IMPORT_MAX_ROWS} packages can be imported at once.")
+
+    defaults, overrides = import_defaults(user)
+
+    # many=True builds the row serializer's fields once rather than once per row
+    serializer = PackageImportSerializer(data=rows, many=True, context={"preloaded": PackageImportSerializer.preload()})
+    if not serializer.is_valid():
+        return [], {number: row_errors for number, row_errors in enumerate(serializer.errors, 1) if row_errors}
+
+    packages, errors = [], {}
+    for number, data in enumerate(serializer.validated_data, 1):
+        package = Package(**{**defaults, **data, **overrides})
+        if not package.sender_latLng or not package.sender_phone:
+            errors[number] = {"sender": ["Sender phone and location are required."]}
+        packages.append(package)
+
+    if errors:
+        return [], errors
+
+    resolve_offices(packages)
+
+    with transaction.atomic():
+        for package, number in zip(packages, package_numbers.take(len(packages))):
+            package.package_number = number
+            package.slug = f"{slugify(package.name)}-{str(uuid.uuid4())[:10]}"
+            package.created_by = user
+            package.created_by_role = user.role
+            package.sender_user = user
+
+        bulk_create_with_public_ids(Package, packages, "package_id", "AWB", batch_size=settings.PACKAGE_IMPORT_BATCH_SIZE)
+
+        # bulk_create skips post_save, so invoices and notifications go out as one job
+        publish("apps.deliveries.tasks.process_imported_packages", args=[[str(package.id) for package in packages]])
+
+    return packages, {}
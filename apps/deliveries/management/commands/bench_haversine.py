@@ -0,0 +1,33 @@
+import random
+import timeit
+from django.core.management.base import BaseCommand
+from geopy.distance import geodesic
+
+from core.utils.geo import distances_km
+
+
+class Command(BaseCommand):
+    help = "Compare geopy geodesic with the vectorized distance module for one point against many."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        origin = (-1.2864, 36.8172)
+        points = [(rng.uniform(-4.6, 4.6), rng.uniform(33.9, 41.9)) for _ in range(options["points"])]
+
+        geopy_time = timeit.timeit(lambda: [geodesic(origin, point).km for point in points], number=1)
+        fast_time = timeit.timeit(lambda: distances_km(origin, points), number=5) / 5
+        accurate_time = timeit.timeit(lambda: distances_km(origin, points, accurate=True), number=5) / 5
+
+        expected = [geodesic(origin, point).km for point in points]
+        fast_error = max(abs(a - b) / b for a, b in zip(distances_km(origin, points), expected))
+        accurate_error = max(abs(a - b) / b for a, b in zip(distances_km(origin, points, accurate=True), expected))
+
+        self.stdout.write(f"1 origin vs {len(points)} points")
+        self.stdout.write(f"{'method':>18} {'ms':>10} {'speedup':>9} {'max rel error':>14}")
+        self.stdout.write(f"{'geopy geodesic':>18} {geopy_time * 1000:>10.2f} {1:>8.0f}x {0:>14.2e}")
+        self.stdout.write(f"{'numpy haversine':>18} {fast_time * 1000:>10.2f} {geopy_time / fast_time:>8.0f}x {fast_error:>14.2e}")
+        self.stdout.write(f"{'numpy accurate':>18} {accurate_time * 1000:>10.2f} {geopy_time / accurate_time:>8.0f}x {accurate_error:>14.2e}")
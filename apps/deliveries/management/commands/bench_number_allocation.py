@@ -0,0 +1,85 @@
+import time
+import threading
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from apps.deliveries.models import Package
+from core.utils.sequences import NumberAllocator
+
+
+BENCH_SEQUENCE = "bench_number_allocation_seq"
+
+
+class RollBack(Exception):
+    pass
+
+
+def allocate_by_table_lock():
+    # what Package.save used to do: lock the table and scan for the max
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {Package._meta.db_table} IN EXCLUSIVE MODE")
+    return (Package.objects.aggregate(Max("package_number"))["package_number__max"] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Order-creation throughput with the old table-locking number allocation and the sequence "
+        "allocator, for several parallel writers. Needs PostgreSQL. Transactions are rolled back, "
+        "but the locking mode does block real writers while it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", default="1,8,32")
+        parser.add_argument("--orders", type=int, default=50, help="orders per writer")
+        parser.add_argument("--work-ms", type=float, default=5, help="time the rest of an order's transaction takes")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("This benchmark needs PostgreSQL.")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {BENCH_SEQUENCE}")
+
+        allocator = NumberAllocator(BENCH_SEQUENCE, "deliveries.Package", "package_number")
+        work = options["work_ms"] / 1000
+
+        try:
+            self.stdout.write(f"{'writers':>8} {'table lock orders/s':>20} {'sequence orders/s':>18} {'speedup':>9}")
+
+            for writers in [int(w) for w in options["writers"].split(",")]:
+                locked = self.run(writers, options["orders"], work, allocate_by_table_lock)
+                sequenced = self.run(writers, options["orders"], work, allocator.next)
+                self.stdout.write(f"{writers:>8} {locked:>20.1f} {sequenced:>18.1f} {sequenced / locked:>8.1f}x")
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP SEQUENCE IF EXISTS {BENCH_SEQUENCE}")
+
+
+    def run(self, writers, orders, work, allocate):
+        barrier = threading.Barrier(writers + 1)
+
+        def writer():
+            barrier.wait()
+            try:
+                for _ in range(orders):
+                    try:
+                        with transaction.atomic():
+                            allocate()
+                            time.sleep(work)
+                            raise RollBack
+                    except RollBack:
+                        pass
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+
+        return writers * orders / (time.perf_counter() - started)
@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.deliveries.imports import read_rows, import_packages, PackageImportError
+
+
+class Command(BaseCommand):
+    help = "Import packages from a CSV or JSON file on behalf of a user, the same way the import_packages endpoint does."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="email of the uploading user")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        started = time.perf_counter()
+        try:
+            with open(options["path"], encoding="utf-8-sig") as file:
+                rows = read_rows(file, options["path"])
+            packages, errors = import_packages(rows, user)
+        except (OSError, PackageImportError) as e:
+            raise CommandError(str(e))
+
+        if errors:
+            for number, row_errors in sorted(errors.items()):
+                self.stderr.write(f"row {number}: {row_errors}")
+            raise CommandError(f"{len(errors)} invalid rows, nothing was imported.")
+
+        self.stdout.write(f"Imported {len(packages)} packages in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.deliveries.tracking import prune
+
+
+class Command(BaseCommand):
+    help = "Delete stage tracks that ended more than TRACK_RETENTION_DAYS ago. Meant to run daily from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.TRACK_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Deleted {prune(options['days'])} tracks")
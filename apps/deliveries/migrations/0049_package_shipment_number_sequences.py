@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+SEQUENCES = [
+    ("deliveries_package_number_seq", "deliveries_package", "package_number"),
+    ("deliveries_shipment_number_seq", "deliveries_shipment", "shipment_number"),
+]
+
+
+def create_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for sequence, table, column in SEQUENCES:
+            cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence}")
+            # continue after the highest number already handed out
+            cursor.execute(f"SELECT setval('{sequence}', COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, false)")
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for sequence, _, _ in SEQUENCES:
+            cursor.execute(f"DROP SEQUENCE IF EXISTS {sequence}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0048_remove_intracitypackagepricing_base_price_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequences, drop_sequences),
+    ]
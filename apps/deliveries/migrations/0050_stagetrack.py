@@ -0,0 +1,36 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0049_package_shipment_number_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StageTrack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.TextField(default='')),
+                ('point_count', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(db_index=True)),
+                ('last_time', models.BigIntegerField(default=0)),
+                ('last_lat', models.IntegerField(default=0)),
+                ('last_lng', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='shipmenttracking',
+            index=models.Index(fields=['shipment_stage', 'timestamp'], name='deliveries__shipmen_164127_idx'),
+        ),
+        migrations.AddField(
+            model_name='stagetrack',
+            name='shipment_stage',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='track', to='deliveries.shipmentstage'),
+        ),
+    ]
@@ -1,23 +1,27 @@
 import os
 import uuid
-import qrcode
-import string
-import random
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Max, Min, Q
+from django.db.models import Max, Min
 from django.utils.text import slugify
-import qrcode.constants
+from django.urls import reverse
 from apps.accounts.models import Office, User, DriverLocation, PartnerProfile
-from geopy.distance import geodesic
 from apps.fullloads.models import *
+from core.utils.spatial import get_nearest_office
+from core.utils.sequences import NumberAllocator
+from core.utils.public_ids import save_with_public_id
+from core.utils.qrcodes import sign_qr_url
 # Create your models here.
 
 
+package_numbers = NumberAllocator("deliveries_package_number_seq", "deliveries.Package", "package_number")
+shipment_numbers = NumberAllocator("deliveries_shipment_number_seq", "deliveries.Shipment", "shipment_number")
+
+
 class County(models.Model):
     name = models.CharField(max_length=255, unique=True)
 
@@ -130,33 +134,13 @@ class InterCountyRoute(models.Model):
             pass
 
 
-
-    @classmethod
-    def get_or_create_bidirectional(cls, origin_office, destination_office, size_category):
-        route = cls.objects.filter(
-            size_category=size_category
-        ).filter(
-            Q(origins=origin_office, destinations=destination_office)
-            | Q(origins=destination_office, destinations=origin_office)
-        ).distinct().first()
-
-        if route:
-            return route, False
-        
-
-        # create new route
-        route = cls.objects.create(size_category=size_category)
-        route.origins.add(origin_office)
-        route.destinations.add(destination_office)
-        return route, True
-    
     def includes_offices(self, origin_office, destination_office):
-        return(
-            self.origins.filter(id=origin_office.id).exists() and
-            self.destinations.filter(id=destination_office.id).exists()
+        origin_ids = {office.id for office in self.origins.all()}
+        destination_ids = {office.id for office in self.destinations.all()}
+        return (
+            origin_office.id in origin_ids and destination_office.id in destination_ids
         ) or (
-            self.origins.filter(id=destination_office.id).exists() and
-            self.destinations.filter(id=origin_office.id).exists()
+            destination_office.id in origin_ids and origin_office.id in destination_ids
         )
     
     
@@ -187,11 +171,6 @@ class LastMileDeliveryPolicy(models.Model):
 
 
 
-
-def generateID(pref):
-    random_id = "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
-    return f"{pref}{random_id}"
-
 def UserPackageImgPath(instance, filename):
     user_id = str(instance.created_by.id).replace("-","")
     return f"packages/{user_id}/{filename}"
@@ -287,59 +266,34 @@ class Package(models.Model):
     payment_method = models.CharField(max_length=50, choices=PAYMENT_METHODS, default="mpesa")
 
     def save(self, *args, **kwargs):
-        if not self.package_id:
-            while True:
-                new_id = generateID("AWB")
-                if not Package.objects.filter(package_id=new_id).exists():
-                    self.package_id = new_id
-                    break
-
         if self.package_number is None:
-            with transaction.atomic():
-                last_number = Package.objects.select_for_update().aggregate(Max('package_number'))['package_number__max'] or 0
-                self.package_number = last_number + 1
+            self.package_number = package_numbers.next()
 
         if not self.slug:
             base = slugify(self.name)
             unique_suffix = str(uuid.uuid4())[:10]
             self.slug = f"{base}-{unique_suffix}"
 
-        if not self.origin_office:
+        if not self.origin_office_id:
             try:
                 lat, lng = map(float, self.sender_latLng.split(','))
                 self.origin_office = self.get_nearest_office(lat, lng)
             except Exception as e:
                 print(f"Error parsing sender coordinates: {e}")
 
-        if not self.destination_office:
+        if not self.destination_office_id:
             try:
                 lat, lng = map(float, self.recipient_latLng.split(','))
                 self.destination_office = self.get_nearest_office(lat, lng)
             except Exception as e:
                 print(f"Error parsing recipient coordinates: {e}")
 
-        if not self.qrcode_svg:
-            self.generateQRCode()
-
-        super().save(*args, **kwargs)
+        save_with_public_id(self, "package_id", "AWB", super().save, *args, **kwargs)
 
 
     @staticmethod
     def get_nearest_office(lat, lng):
-        offices = Office.objects.all()
-        package_coords = (float(lat), float(lng))
-
-        nearest = None
-        min_distance = float("inf")
-
-        for office in offices:
-            office_coords = (float(office.geo_lat), float(office.geo_lng))
-            distance = geodesic(package_coords, office_coords).km
-
-            if distance < min_distance:
-                min_distance = distance
-                nearest = office
-        return nearest
+        return get_nearest_office((lat, lng))
 
     
     class Meta:
@@ -352,31 +306,15 @@ class Package(models.Model):
         ]
 
 
-    def generateQRCode(self):
-        confirm_url = f"https://app.expa.co.ke/confirm/order/{self.package_id}"
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4
-        )
-
-        qr.add_data(confirm_url)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
+    @property
+    def qr_data(self):
+        return f"https://app.expa.co.ke/confirm/order/{self.package_id}"
 
-        # construct filepath
-        file_name = f"{self.package_id}.png"
-        file_path = os.path.join(settings.MEDIA_ROOT, "packages/qr_codes", file_name)
 
-        # ensure qrcodes directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        img.save(file_path)
+    @property
+    def qr_url(self):
+        return sign_qr_url(reverse("package_qr_code", args=[self.package_id, "svg"]), self.qr_data)
 
-        # save relative path
-        self.qrcode_svg.name = f"packages/qr_codes/{file_name}"
         
     
 
@@ -460,51 +398,21 @@ class Shipment(models.Model):
 
 
     def save(self, *args, **kwargs):
-        if not self.shipment_id:
-            while True:
-                new_id = generateID("MF")
-                if not Shipment.objects.filter(shipment_id=new_id).exists():
-                    self.shipment_id = new_id
-                    break
-
         if self.shipment_number is None:
-            with transaction.atomic():
-                last_number = Shipment.objects.select_for_update().aggregate(
-                    Max('shipment_number')
-                )['shipment_number__max'] or 0
-                self.shipment_number = last_number + 1
-
-        if not self.qrcode_svg:
-            self.generateQRCode()
+            self.shipment_number = shipment_numbers.next()
 
-        super().save(*args, **kwargs)
+        save_with_public_id(self, "shipment_id", "MF", super().save, *args, **kwargs)
 
     
-    def generateQRCode(self):
-        confirm_url = f"https://app.expa.co.ke/confirm/shipment/{self.shipment_id}"
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4
-        )
-
-        qr.add_data(confirm_url)
-        qr.make(fit=True)
+    @property
+    def qr_data(self):
+        return f"https://app.expa.co.ke/confirm/shipment/{self.shipment_id}"
 
-        img = qr.make_image(fill_color="black", back_color="white")
 
-        # construct filepath
-        file_name = f"{self.shipment_id}.png"
-        file_path = os.path.join(settings.MEDIA_ROOT, "shipments/qr_codes", file_name)
+    @property
+    def qr_url(self):
+        return sign_qr_url(reverse("shipment_qr_code", args=[self.shipment_id, "svg"]), self.qr_data)
 
-        # ensure qrcodes directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        img.save(file_path)
-
-        # save relative path
-        self.qrcode_svg.name = f"shipments/qr_codes/{file_name}"
         
 
     def __str__(self):
@@ -596,11 +504,38 @@ class ShipmentTracking(models.Model):
     status_update = models.CharField(max_length=100)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["shipment_stage", "timestamp"]),
+        ]
+
 
     def __str__(self):
         return f"Tracking shipment of {self.shipment.id}"
 
 
+
+class StageTrack(models.Model):
+    """
+    A stage's whole GPS trail in one row: (seconds, lat, lng) deltas packed
+    with the encoded-polyline scheme, see apps.deliveries.tracking. The last
+    point is kept unpacked so appends don't decode the trail.
+    """
+    shipment_stage = models.OneToOneField(ShipmentStage, on_delete=models.CASCADE, related_name="track")
+    points = models.TextField(default="")
+    point_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(db_index=True)
+
+    last_time = models.BigIntegerField(default=0)
+    last_lat = models.IntegerField(default=0)
+    last_lng = models.IntegerField(default=0)
+
+
+    def __str__(self):
+        return f"Track of {self.shipment_stage} ({self.point_count} points)"
+
+
 # shipment/package proof of delivery
 class ProofOfDelivery(models.Model):
     shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, null=True, blank=True, related_name="proofs")
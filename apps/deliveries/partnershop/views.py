@@ -1,5 +1,4 @@
 import json
-import googlemaps
 from django.shortcuts import render
 from decimal import Decimal
 
@@ -14,9 +13,10 @@ from apps.deliveries.models import *
 from apps.deliveries.partnershop.serializers import *
 from apps.payments.models import Invoice
 from core.utils.payments import NobukPayments
-
-
-gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+from core.utils.maps import get_road_distances_km
+from core.utils.spatial import get_nearest_office
+from core.utils.ratecards import rate_cards
+from apps.deliveries.quotes import get_lastmile_price, office_coords
 
 
 # Views come here
@@ -70,15 +70,6 @@ class PackageUploadView(generics.ListCreateAPIView):
 
 
 
-def get_road_distance_km(origin, destination):
-    result = gmaps.distance_matrix(origins=[origin], destinations=[destination], mode="driving")
-    try:
-        distance_meters = result['rows'][0]['elements'][0]['distance']['value']  # meters
-        return round(Decimal(distance_meters) / 1000, 2)  # km
-    except Exception:
-        return None
-
-
 def calculate_volumetric_weight(length_cm, width_cm, height_cm, divisor=6000):
     return (length_cm * width_cm * height_cm ) / divisor
 
@@ -89,24 +80,6 @@ def calculate_chargeable_weight(actual_weight_kg, length_cm, width_cm, height_cm
 
 
 
-def get_nearest_office(coords):
-    offices = Office.objects.all()
-
-    nearest = None
-    min_distance = float("inf")
-
-    for office in offices:
-        try:
-            distance = geodesic(coords, (float(office.geo_lat), float(office.geo_lng))).km
-            if distance < min_distance:
-                min_distance = distance
-                nearest = office
-        except Exception:
-            continue
-
-    return nearest
-
-
 class IntraCityPriceCalculationView(APIView):
     permission_classes = [ IsAuthenticated, IsPartnerPickup]
 
@@ -115,8 +88,10 @@ class IntraCityPriceCalculationView(APIView):
         user = self.request.user
 
         try:
-            size_category = data.get("size_category")
-            size_category = SizeCategory.objects.get(id=size_category)
+            rate_card = rate_cards.get()
+            size_category = rate_card.size_category_by_id(int(data.get("size_category") or 0))
+            if not size_category:
+                return Response({ "success": False, "message": "Invalid size_category." }, status=400)
             weight = Decimal(data.get("weight", 0))
             sender_latLng = user.partner_profile.location_latLang
             recipient_latLng = data.get("recipient_latLng")
@@ -124,13 +99,16 @@ class IntraCityPriceCalculationView(APIView):
             sender_coords = tuple(round(float(coord), 5) for coord in sender_latLng.split(","))
             recipient_coords = tuple(round(float(coord), 5) for coord in recipient_latLng.split(","))
 
-            distance_km = get_road_distance_km(sender_coords, recipient_coords)
-            
+            distance_km = get_road_distances_km({"distance": (sender_coords, recipient_coords)})["distance"]
+            if distance_km is None:
+                return Response({ "success": False, "message": "Failed to calculate road distance." }, status=500)
             
 
             if size_category.name.lower() == "parcel":
                 
-                policy = IntraCityParcelPolicy.objects.first()
+                policy = rate_card.intracity_parcel_policy()
+                if not policy:
+                    return Response({ "success": False, "message": "No intracity parcel policy configured." }, status=404)
                 
                 if weight > policy.max_weight:
                     print(distance_km)
@@ -151,19 +129,16 @@ class IntraCityPriceCalculationView(APIView):
                 
 
             elif size_category.name.lower() == "package":
-                pricing = IntraCityPackagePricing.objects.filter(
-                    min_weight__lte=weight,
-                    max_weight__gte=weight
-                ).first()
+                pricing = rate_card.intracity_package_pricing(weight, distance_km)
 
                 if not pricing:
                     return Response({ "error": "No pricing rule for this weight bracket." }, status=400)
 
                 if distance_km <= 5:
-                    price = pricing.base_price
+                    price = pricing.price
                 else:
                     extra_km = distance_km - Decimal(5)
-                    price = pricing.base_price + (extra_km * pricing.extra_km_price)
+                    price = pricing.price + (extra_km * pricing.extra_km_price)
 
             else:
                 return Response({ "success": False, "message": "Invalid size_category." }, status=400)
@@ -221,11 +196,10 @@ class InterCountyPriceCalculator(APIView):
             chargeable_weight = calculate_chargeable_weight(weight, length, width, height)
 
             # Match route
-            route = InterCountyRoute.objects.filter(
-                origins=origin_office,
-                destinations=destination_office,
-                size_category_id=size_category_id
-            ).first()
+            rate_card = rate_cards.get()
+            route = rate_card.intercounty_route(
+                origin_office.id, destination_office.id, int(size_category_id or 0), bidirectional=False
+            )
 
             if not route:
                 return Response({
@@ -245,11 +219,7 @@ class InterCountyPriceCalculator(APIView):
                 
                 excess_weight = chargeable_weight - base_limit
                 
-                tier = InterCountyWeightTier.objects.filter(
-                    route=route,
-                    min_weight__lte=excess_weight,
-                    max_weight__gte=excess_weight
-                ).first()
+                tier = rate_card.intercounty_tier(route.id, excess_weight)
                 
 
                 if not tier:
@@ -270,6 +240,8 @@ class InterCountyPriceCalculator(APIView):
             if requires_last_mile:
                 print(requires_last_mile)
                 last_mile_fee = self.get_lastmile_price(destination_office, recipient_coords)
+                if last_mile_fee is None:
+                    return Response({ "success": False, "message": "Failed to calculate road distance." }, status=500)
 
                 print("Last mile ....")
                 print(last_mile_fee)
@@ -294,24 +266,12 @@ class InterCountyPriceCalculator(APIView):
 
 
     def get_lastmile_price(self, office, recipient_coords):
-        try:
-            
-            policy = office.last_mile_policy 
-        except LastMileDeliveryPolicy.DoesNotExist:
-            return Decimal("0.00") 
-        
-        office_coord = (float(office.geo_lat),float(office.geo_lng))
-        
-        distance_km = get_road_distance_km(office_coord, recipient_coords)
-        distance_km = Decimal(round(distance_km, 2))
-
-        if distance_km <= policy.free_within_km:
+        """The last-mile fee, or None when the road distance isn't found within the deadline."""
+        policy = rate_cards.get().last_mile_policy(office.id)
+        if not policy:
             return Decimal("0.00")
 
-        
-        extra_km = distance_km - policy.free_within_km
-        
-        return extra_km * policy.per_km_fee
-
-
-
+        distance_km = get_road_distances_km({"last_mile": (office_coords(office), recipient_coords)})["last_mile"]
+        if distance_km is None:
+            return None
+        return get_lastmile_price(policy, distance_km)
@@ -0,0 +1,393 @@
+from decimal import Decimal
+from django.conf import settings
+from django.core import signing
+from rest_framework import status
+
+from apps.deliveries.coverage import intracity_coverage
+from core.utils.maps import get_road_distance_matrix_km, get_road_distance_pairs_km, get_road_distances_km
+from core.utils.ratecards import rate_cards
+from core.utils.spatial import get_nearest_office
+
+
+QUOTE_TOKEN_SALT = "deliveries.quote"
+
+
+class QuoteError(Exception):
+    def __init__(self, message, status=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+
+def sign_quote(delivery_type, weight, length, width, height, sender_coords, recipient_coords, **details):
+    """
+    Signed token carrying a computed quote, so order creation can reuse the
+    resolved offices and price instead of quoting again. The inputs are kept
+    in the token so it can only be redeemed for the same shipment.
+    """
+    quote = {
+        "delivery_type": delivery_type,
+        "weight": str(weight),
+        "length": str(length),
+        "width": str(width),
+        "height": str(height),
+        "sender": list(sender_coords),
+        "recipient": list(recipient_coords),
+    }
+    quote.update({key: str(value) if isinstance(value, Decimal) else value for key, value in details.items()})
+    return signing.dumps(quote, salt=QUOTE_TOKEN_SALT, compress=True)
+
+
+def read_quote(token):
+    """Raises signing.BadSignature, or SignatureExpired past QUOTE_TOKEN_MAX_AGE_SECONDS."""
+    return signing.loads(token, salt=QUOTE_TOKEN_SALT, max_age=settings.QUOTE_TOKEN_MAX_AGE_SECONDS)
+
+
+def quote_matches(quote, data):
+    """Whether the shipment in data is the one the quote was computed for."""
+    try:
+        if quote["delivery_type"] != data.get("delivery_type"):
+            return False
+
+        if list(parse_latlng(data.get("sender_latLng"))) != quote["sender"]:
+            return False
+        if list(parse_latlng(data.get("recipient_latLng"))) != quote["recipient"]:
+            return False
+
+        for field in ("weight", "length", "width", "height"):
+            if Decimal(str(data.get(field) or 0)) != Decimal(quote[field]):
+                return False
+
+    except (AttributeError, ValueError, ArithmeticError):
+        return False
+
+    if quote["delivery_type"] == "inter_county":
+        return (
+            bool(data.get("requires_pickup")) == quote["requires_pickup"]
+            and bool(data.get("requires_last_mile")) == quote["requires_last_mile"]
+        )
+    return True
+
+
+
+def parse_latlng(latlng):
+    return tuple(round(float(coord), 5) for coord in latlng.split(","))
+
+
+def office_coords(office):
+    return (float(office.geo_lat), float(office.geo_lng))
+
+
+def calculate_volumetric_weight(length_cm, width_cm, height_cm, divisor=6000):
+    return (length_cm * width_cm * height_cm ) / divisor
+
+
+def calculate_chargeable_weight(actual_weight_kg, length_cm, width_cm, height_cm):
+    volumetric_weight = calculate_volumetric_weight(length_cm, width_cm, height_cm)
+    return max(actual_weight_kg, volumetric_weight)
+
+
+def intracity_candidates(sender_coords, recipient_coords):
+    """
+    Returns (edge_policies, covering_policy) from the coverage map: the first
+    policy whose zone fully covers an endpoint, and the policies before it
+    where an endpoint only sits near the edge and needs a road check.
+    """
+    edge_policies = []
+
+    for policy, interior in intracity_coverage.get().candidates(sender_coords, recipient_coords):
+        if interior:
+            return edge_policies, policy
+        edge_policies.append(policy)
+
+    return edge_policies, None
+
+
+def intracity_matrices(sender_coords, recipient_coords, edge_policies):
+    """The distance matrix requests an intra-city quote makes, as [(origins, destinations)]."""
+    matrices = [([sender_coords], [recipient_coords])]
+    if edge_policies:
+        matrices.append(([office_coords(p.office) for p in edge_policies], [sender_coords, recipient_coords]))
+    return matrices
+
+
+def intracity_lookups(sender_coords, recipient_coords):
+    """Road distances an intra-city quote needs, as {name: (origin, destination)}: exactly the pairs pricing requests."""
+    edge_policies, _ = intracity_candidates(sender_coords, recipient_coords)
+    return {
+        f"{i}_{j}_{k}": (origin, destination)
+        for i, (origins, destinations) in enumerate(intracity_matrices(sender_coords, recipient_coords, edge_policies))
+        for j, origin in enumerate(origins)
+        for k, destination in enumerate(destinations)
+    }
+
+
+def find_intracity_policy(sender_coords, recipient_coords):
+    """
+    Returns (policy, sender -> recipient road distance) for the first policy
+    whose zone covers the sender or the recipient. Only zones the coverage
+    map puts near an endpoint go into the office -> endpoint matrix request,
+    which is kept apart from the sender row so no sender -> sender element
+    is paid for.
+    """
+    edge_policies, covering_policy = intracity_candidates(sender_coords, recipient_coords)
+    matrices = [
+        get_road_distance_matrix_km(origins, destinations)
+        for origins, destinations in intracity_matrices(sender_coords, recipient_coords, edge_policies)
+    ]
+    distance_km = matrices[0][0][0]
+
+    for policy, road_km in zip(edge_policies, matrices[1] if edge_policies else []):
+        radius_km = Decimal(policy.radius_km)
+        if any(km is not None and km <= radius_km for km in road_km):
+            return policy, distance_km
+
+    return covering_policy, distance_km
+
+
+
+def quote_intracity(weight, length, width, height, sender_coords, recipient_coords):
+    valid_policy, distance_km = find_intracity_policy(sender_coords, recipient_coords)
+    if distance_km is None:
+        raise QuoteError("Failed to calculate road distance.", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    if not valid_policy:
+        raise QuoteError("Pickup and dropoff must be within the same intracity zone.")
+
+    policy = valid_policy
+
+    if weight > policy.max_weight:
+        size_category_name = "package"
+    else:
+        size_category_name = "parcel"
+
+    if size_category_name == "parcel":
+        if distance_km > policy.max_distance_km:
+            raise QuoteError("Distance exceeds max intracity coverage.")
+
+        if distance_km <= policy.base_km:
+            price = policy.base_price
+        else:
+            extra_km = Decimal(distance_km) - policy.base_km
+            price = policy.base_price + (extra_km * policy.extra_price_per_km)
+
+    else:
+        chargeable_weight = Decimal(calculate_chargeable_weight(weight, length, width, height))
+
+        package_policy = rate_cards.get().intracity_package_pricing(
+            chargeable_weight, distance_km, office_id=policy.office_id
+        )
+        if not package_policy:
+            raise QuoteError("No package pricing rule for this weight and distance bracket.")
+
+        price = package_policy.price
+
+    origin_office = get_nearest_office(sender_coords)
+    destination_office = get_nearest_office(recipient_coords)
+
+    return {
+        "success": True,
+        "distance_km": round(distance_km, 2),
+        "total_fee": round(price),
+        "size_category": "1" if size_category_name == "parcel" else "2",
+        "quote_token": sign_quote(
+            "intra_city", weight, length, width, height, sender_coords, recipient_coords,
+            origin_office_id=origin_office.id if origin_office else None,
+            destination_office_id=destination_office.id if destination_office else None,
+            distance_km=round(distance_km, 2),
+            total_fee=round(price),
+        ),
+    }
+
+
+
+def intercounty_lookups(origin_office, destination_office, sender_coords, recipient_coords, requires_pickup, requires_last_mile):
+    """Road distances an inter-county quote needs, as {name: (origin, destination)}."""
+    lookups = {}
+    if requires_pickup and origin_office.enable_pickup:
+        lookups["pickup"] = (sender_coords, office_coords(origin_office))
+
+    if requires_last_mile and rate_cards.get().last_mile_policy(destination_office.id):
+        lookups["last_mile"] = (office_coords(destination_office), recipient_coords)
+    return lookups
+
+
+def get_lastmile_price(policy, distance_km):
+    distance_km = Decimal(round(distance_km, 2))
+
+    if distance_km <= policy.free_within_km:
+        return Decimal("0.00")
+
+    extra_km = distance_km - policy.free_within_km
+    return extra_km * policy.per_km_fee
+
+
+def get_pickup_price(origin_office, distance_km, chargeable_weight, size_category_name):
+    rate_card = rate_cards.get()
+    pickup_distance_km = Decimal(round(distance_km, 2))
+
+    free_km = origin_office.pickup_first_free_kms
+    if pickup_distance_km <= free_km:
+        return Decimal("0.00")
+
+    chargeable_distance = pickup_distance_km - free_km
+
+    if size_category_name == "package":
+        intracity = rate_card.intracity_package_pricing(chargeable_weight, chargeable_distance)
+        if intracity:
+            return intracity.price
+
+    else:
+        intracity_policy = rate_card.intracity_parcel_policy(origin_office.id)
+        if intracity_policy:
+            if chargeable_distance <= intracity_policy.base_km:
+                return intracity_policy.base_price
+
+            extra_km = chargeable_distance - intracity_policy.base_km
+            return intracity_policy.base_price + (extra_km * intracity_policy.extra_price_per_km)
+
+    return Decimal("0.00")
+
+
+def quote_intercounty(weight, length, width, height, sender_coords, recipient_coords, requires_pickup=False, requires_last_mile=False):
+    origin_office = get_nearest_office(sender_coords)
+    destination_office = get_nearest_office(recipient_coords)
+    rate_card = rate_cards.get()
+
+    if not origin_office or not destination_office:
+        raise QuoteError("Could not resolve nearest offices.", status.HTTP_404_NOT_FOUND)
+
+    chargeable_weight = calculate_chargeable_weight(weight, length, width, height)
+
+    # Auto-determine size_category
+    size_category_name = "package" if chargeable_weight > Decimal("50.99") else "parcel"
+    size_category = rate_card.size_category(size_category_name)
+
+    if not size_category:
+        raise QuoteError(f"No size category found for {size_category_name}")
+
+    # road distances are independent of each other, look them up together
+    distances = get_road_distances_km(intercounty_lookups(
+        origin_office, destination_office, sender_coords, recipient_coords, requires_pickup, requires_last_mile
+    ))
+    if any(distance is None for distance in distances.values()):
+        raise QuoteError("Failed to calculate road distance.", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    route = rate_card.intercounty_route(origin_office.id, destination_office.id, size_category.id)
+    if not route:
+        raise QuoteError("No intercounty route pricing found for selected path.", status.HTTP_404_NOT_FOUND)
+
+    # Base/intercounty price
+    tier = rate_card.intercounty_tier(route.id, chargeable_weight)
+    if not tier:
+        raise QuoteError("No matching intercounty tier for this weight and route.", status.HTTP_404_NOT_FOUND)
+
+    base_fee = tier.price_per_kg if tier.min_weight == 0 else (tier.price_per_kg * chargeable_weight)
+
+    pickup_fee = Decimal("0.00")
+    if "pickup" in distances:
+        pickup_fee = get_pickup_price(origin_office, distances["pickup"], chargeable_weight, size_category_name)
+
+    last_mile_fee = Decimal("0.00")
+    if "last_mile" in distances:
+        last_mile_fee = get_lastmile_price(rate_card.last_mile_policy(destination_office.id), distances["last_mile"])
+
+    total_fee = base_fee + pickup_fee + last_mile_fee
+
+    return {
+        "success": True,
+        "pickup_fee": pickup_fee,
+        "base_fee": base_fee,
+        "last_mile_fee": last_mile_fee,
+        "total_fee": total_fee,
+        "origin_office_id": origin_office.id,
+        "destination_office_id": destination_office.id,
+        "chargeable_weight": round(chargeable_weight, 2),
+        "size_category": "1" if size_category_name == "parcel" else "2",
+        "quote_token": sign_quote(
+            "inter_county", weight, length, width, height, sender_coords, recipient_coords,
+            requires_pickup=requires_pickup,
+            requires_last_mile=requires_last_mile,
+            origin_office_id=origin_office.id,
+            destination_office_id=destination_office.id,
+            chargeable_weight=round(chargeable_weight, 2),
+            total_fee=total_fee,
+        ),
+    }
+
+
+
+def parse_shipment(data):
+    """Validate one bulk quote entry into (quote function, arguments)."""
+    try:
+        weight = Decimal(str(data.get("weight", 0)))
+        length = Decimal(str(data.get("length", 0)))
+        width = Decimal(str(data.get("width", 0)))
+        height = Decimal(str(data.get("height", 0)))
+        sender_coords = parse_latlng(data["sender_latLng"])
+        recipient_coords = parse_latlng(data["recipient_latLng"])
+    except (KeyError, AttributeError, ValueError, ArithmeticError):
+        raise QuoteError("Invalid weight, dimensions or coordinates.")
+
+    delivery_type = data.get("delivery_type")
+    if delivery_type == "intra_city":
+        return quote_intracity, (weight, length, width, height, sender_coords, recipient_coords)
+
+    if delivery_type == "inter_county":
+        requires_pickup = bool(data.get("requires_pickup"))
+        requires_last_mile = bool(data.get("requires_last_mile"))
+        return quote_intercounty, (weight, length, width, height, sender_coords, recipient_coords, requires_pickup, requires_last_mile)
+
+    raise QuoteError("delivery_type must be intra_city or inter_county.")
+
+
+def quote_lookups(quote, args):
+    if quote is quote_intracity:
+        return intracity_lookups(*args[4:6])
+
+    sender_coords, recipient_coords, requires_pickup, requires_last_mile = args[4:]
+    origin_office = get_nearest_office(sender_coords)
+    destination_office = get_nearest_office(recipient_coords)
+    if not origin_office or not destination_office:
+        return {}
+    return intercounty_lookups(origin_office, destination_office, sender_coords, recipient_coords, requires_pickup, requires_last_mile)
+
+
+def quote_many(shipments):
+    """
+    Quote a list of shipments in one pass. Identical shipments are priced
+    once, and every road distance the batch needs is fetched in grouped
+    Distance Matrix requests before pricing starts, so each quote is then
+    served from the caches.
+    """
+    parsed = []
+    for data in shipments:
+        try:
+            parsed.append(parse_shipment(data))
+        except QuoteError as e:
+            parsed.append(e)
+
+    unique = list(dict.fromkeys(entry for entry in parsed if not isinstance(entry, QuoteError)))
+
+    pairs = set()
+    for quote, args in unique:
+        pairs.update(quote_lookups(quote, args).values())
+    get_road_distance_pairs_km(pairs)
+
+    quotes = {}
+    for quote, args in unique:
+        try:
+            quotes[(quote, args)] = quote(*args)
+        except QuoteError as e:
+            quotes[(quote, args)] = e
+        except Exception as e:
+            quotes[(quote, args)] = QuoteError(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    results = []
+    for entry in parsed:
+        result = entry if isinstance(entry, QuoteError) else quotes[entry]
+        if isinstance(result, QuoteError):
+            result = {"success": False, "message": result.message}
+        results.append(result)
+    return results
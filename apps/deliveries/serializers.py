@@ -1,9 +1,14 @@
+from decimal import Decimal
+from django.core import signing
 from django.forms import ValidationError
 from rest_framework import serializers
 
 from apps.accounts.models import *
 from apps.deliveries.models import VehicleType, VehiclePricing, PackageType, Package, Shipment, SizeCategory, InterCountyRoute, ShipmentPackage, ShipmentTracking, HandOver, UrgencyLevel, ShipmentStage, ProofOfDelivery
+from apps.deliveries.quotes import read_quote, quote_matches
 from apps.messaging.models import Notification
+from apps.messaging.utils import notification, fan_out
+from core.utils.services import get_rider_position
 
 
 
@@ -78,19 +83,75 @@ class ProofOfDeliverySerializer(serializers.ModelSerializer):
 
 
 class PackageWriteSerializer(serializers.ModelSerializer):
+    quote_token = serializers.CharField(write_only=True, required=False)
+
     class Meta:
         model = Package
         fields = [
             "slug","name", "package_type", "size_category", "delivery_type", "is_fragile", "urgency",
             "length", "width", "height", "weight", "pickup_date", "description", "sender_name", "sender_phone", "sender_address", 
             "sender_latLng", "is_paid", "recipient_name", "recipient_phone", "recipient_address", "recipient_latLng", "requires_packaging",
-            "package_id", "status", "requires_last_mile", "requires_pickup", "fees", "payment_phone", "pickup_now", "payment_method"
+            "package_id", "status", "requires_last_mile", "requires_pickup", "fees", "payment_phone", "pickup_now", "payment_method",
+            "quote_token"
         ]
         read_only_fields = [
             "id", "package_id", "current_handler", "delivery_stage_count", "current_stage", "cardholder_name", "card_number", "card_expiry", "card_cvc"
         ]
 
 
+    def validate(self, attrs):
+        token = attrs.pop("quote_token", None)
+        if not token:
+            return attrs
+
+        try:
+            quote = read_quote(token)
+        except signing.SignatureExpired:
+            raise serializers.ValidationError({"quote_token": "Quote has expired, please request a new one."})
+        except signing.BadSignature:
+            raise serializers.ValidationError({"quote_token": "Invalid quote."})
+
+        if not quote_matches(quote, attrs):
+            raise serializers.ValidationError({"quote_token": "Quote does not match this package."})
+
+        # the quote already priced the package and resolved its offices
+        attrs["fees"] = Decimal(str(quote["total_fee"]))
+        attrs["origin_office_id"] = quote["origin_office_id"]
+        attrs["destination_office_id"] = quote["destination_office_id"]
+        return attrs
+
+
+
+
+class PreloadedPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """Looks the pk up in rows loaded once per import, instead of one query per row."""
+
+    def to_internal_value(self, data):
+        instances = self.context["preloaded"][self.queryset.model]
+        try:
+            return instances[int(data)]
+        except (KeyError, TypeError, ValueError):
+            self.fail("does_not_exist", pk_value=data)
+
+
+
+class PackageImportSerializer(PackageWriteSerializer):
+    serializer_related_field = PreloadedPrimaryKeyField
+
+    class Meta(PackageWriteSerializer.Meta):
+        fields = [f for f in PackageWriteSerializer.Meta.fields if f not in ("slug", "package_id", "status")]
+        extra_kwargs = {
+            "sender_phone": {"required": False},
+            "sender_address": {"required": False},
+            "sender_latLng": {"required": False},
+        }
+
+
+    @staticmethod
+    def preload():
+        return {model: model.objects.in_bulk() for model in (PackageType, SizeCategory, UrgencyLevel)}
+
+
 
 
 class PackageSerializer(serializers.ModelSerializer):
@@ -100,6 +161,7 @@ class PackageSerializer(serializers.ModelSerializer):
     rider_location = serializers.SerializerMethodField()
     package_proofs = ProofOfDeliverySerializer(many=True, read_only=True)
     manager_office_id = serializers.SerializerMethodField()
+    qrcode_svg = serializers.SerializerMethodField()
 
     class Meta:
         model = Package
@@ -149,18 +211,16 @@ class PackageSerializer(serializers.ModelSerializer):
             "updated_at": None
         }
 
-        try: 
-            location = courier.location
-            data.update({
-                "lat": location.latitude,
-                "lng": location.longitude,
-                "updated": location.updated_at,
-
-            })
-
-        except DriverLocation.DoesNotExist:
+        position = get_rider_position(courier)
+        if position is None:
             return None
-        
+
+        lat, lng, updated_at = position
+        data.update({
+            "lat": lat,
+            "lng": lng,
+            "updated": updated_at,
+        })
         return data
 
     def get_manager_office_id(self, obj):
@@ -169,6 +229,10 @@ class PackageSerializer(serializers.ModelSerializer):
             return str(user.office.id)
         return None
 
+    def get_qrcode_svg(self, obj):
+        request = self.context.get("request")
+        return request.build_absolute_uri(obj.qr_url) if request else obj.qr_url
+
 
 class PackageListSerializer(serializers.ModelSerializer):
     class Meta:
@@ -219,15 +283,18 @@ class ShipmentSerializer(serializers.ModelSerializer):
         shipment = Shipment.objects.create(manager=manager, **validated_data)
 
         # Link packages
+        notifications = []
         for package_id in packages_data:
             try:
                 package = Package.objects.get(id=package_id)
                 ShipmentPackage.objects.create(shipment=shipment, package=package)
                 package.status = "assigned"
                 package.save()
-                self.send_package_notification(package)
+                if package.sender_user_id:
+                    notifications.append(self.package_notification(package))
             except Package.DoesNotExist:
                 continue
+        fan_out(notifications)
 
         # Initial ShipmentStage
         ShipmentStage.objects.create(
@@ -241,11 +308,11 @@ class ShipmentSerializer(serializers.ModelSerializer):
         return shipment
     
 
-    def send_package_notification(self, package):
-        Notification.objects.create(
-            user=package.sender_user,  # recipient
-            title="Your package has been assigned to a shipment",
-            message=f"Package {package.package_id} is being prepared for delivery.",
+    def package_notification(self, package):
+        return notification(
+            package.sender_user_id,  # recipient
+            "Your package has been assigned to a shipment",
+            f"Package {package.package_id} is being prepared for delivery.",
             notification_type="shipment_update"
         )
 
@@ -277,6 +344,7 @@ class ShipmentReadSerializer(serializers.ModelSerializer):
     originoffice = serializers.SerializerMethodField()
     current_stage = serializers.SerializerMethodField()
     summary = serializers.SerializerMethodField()
+    qrcode_svg = serializers.SerializerMethodField()
     
 
     class Meta:
@@ -326,6 +394,11 @@ class ShipmentReadSerializer(serializers.ModelSerializer):
     
     def get_current_stage(self, obj):
         return obj.current_stage
+
+
+    def get_qrcode_svg(self, obj):
+        request = self.context.get("request")
+        return request.build_absolute_uri(obj.qr_url) if request else obj.qr_url
     
 
 
@@ -349,25 +422,30 @@ class ShipmentUpdateSerializer(serializers.ModelSerializer):
         return instance
 
     def send_notifications(self, shipment):
+        notifications = []
+
         # Notify manager
-        if shipment.manager:
-            Notification.objects.create(
-                user=shipment.manager,
-                title="Shipment accepted",
-                message=f"Driver has accepted shipment {shipment.shipment_id}",
+        if shipment.manager_id:
+            notifications.append(notification(
+                shipment.manager_id,
+                "Shipment accepted",
+                f"Driver has accepted shipment {shipment.shipment_id}",
                 shipment=shipment,
                 notification_type="shipment_update"
-            )
+            ))
 
         # Notify all package owners
         for package in shipment.packages.all():
-            Notification.objects.create(
-                user=package.created_by,
-                title="Package in Transit",
-                message=f"Your package {package.package_id} is now in transit.",
-                package=package,
-                notification_type="shipment_update"
-            )
+            if package.created_by_id:
+                notifications.append(notification(
+                    package.created_by_id,
+                    "Package in Transit",
+                    f"Your package {package.package_id} is now in transit.",
+                    package=package,
+                    notification_type="shipment_update"
+                ))
+
+        fan_out(notifications)
 
 
 
@@ -1,13 +1,17 @@
 import datetime
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
 from django.core.cache import cache
 
 from apps.accounts.models import *
 from apps.deliveries.models import *
-from apps.deliveries.tasks import send_intracity_notifications
-from apps.messaging.utils import send_notification
+from apps.deliveries.tasks import send_intracity_notifications, schedule_driver_notification
+from apps.deliveries.coverage import intracity_coverage
+from core.utils.ratecards import rate_cards
+from apps.messaging.utils import send_notification, notification, fan_out
+from apps.messaging.outbox import publish
 from apps.payments.models import Invoice
 from apps.messaging.models import Notification
 from apps.messaging.views import *
@@ -25,35 +29,17 @@ def send_delivery_notifications_to_drivers(sender, instance, created, **kwargs):
 
     # for intra_city
     if instance.delivery_type == "intra_city":
-        _schedule_driver_notification(instance)
+        schedule_driver_notification(instance)
 
     elif instance.delivery_type == "inter_county" and instance.requires_pickup:
-        _schedule_driver_notification(instance)
+        schedule_driver_notification(instance)
 
 
-def _schedule_driver_notification(instance):
-    if instance.pickup_date:
-        eta = timezone.make_aware(instance.pickup_date) if timezone.is_naive(instance.pickup_date) else instance.pickup_date
-
-        if eta > timezone.now():
-            send_intracity_notifications.apply_async(
-                args=(instance.id,), 
-                eta=eta
-            )
-        else:
-            send_intracity_notifications.delay(instance.id)
-
-    else:
-        send_intracity_notifications.delay(instance.id)
-
-                
-
 
 @receiver(post_save, sender=Package)
 def create_invoice(sender, instance, created, **kwargs):
     if created:
-        from apps.deliveries.tasks import process_package_invoice
-        process_package_invoice.delay(instance.id)
+        publish("apps.deliveries.tasks.process_package_invoice", args=[str(instance.id)], key=f"package:{instance.id}:invoice")
     
 
     
@@ -67,23 +53,24 @@ def notify_on_partner_upload(sender, instance, created, **kwargs):
     office = instance.origin_office
     package = instance
 
-    # Notify office personel
-    managers = User.objects.filter(role="manager", office=office)
-    for manager in managers:
-        Notification.objects.create(
-            user=manager,
-            title=f"New Partner Package - {package.package_id}",
-            message=f"{user.full_name} uploaded a package at {office.name}.",
-            package=package
+    # Notify office personel and the creator
+    managers = User.objects.filter(role="manager", office=office).values_list("id", flat=True)
+    notifications = [
+        notification(
+            manager,
+            f"New Partner Package - {package.package_id}",
+            f"{user.full_name} uploaded a package at {office.name}.",
+            package=package,
         )
-
-    # Notify the creator
-    Notification.objects.create(
-        user=user,
-        title=f"{package.package_id} Upload Confirmed",
-        message=f"Your package, {package.package_id} to {office.name} was uploaded successfully.",
-        package=package
-    )
+        for manager in managers
+    ]
+    notifications.append(notification(
+        user,
+        f"{package.package_id} Upload Confirmed",
+        f"Your package, {package.package_id} to {office.name} was uploaded successfully.",
+        package=package,
+    ))
+    fan_out(notifications)
 
 
 
@@ -117,6 +104,20 @@ def clear_user_packages_cache(sender, instance, **kwargs):
 
 
 
+@receiver([post_save, post_delete], sender=Office)
+@receiver([post_save, post_delete], sender=IntraCityParcelPolicy)
+def rebuild_intracity_coverage(sender, instance, **kwargs):
+    transaction.on_commit(intracity_coverage.invalidate)
 
 
 
+@receiver([post_save, post_delete], sender=SizeCategory)
+@receiver([post_save, post_delete], sender=IntraCityParcelPolicy)
+@receiver([post_save, post_delete], sender=IntraCityPackagePricing)
+@receiver([post_save, post_delete], sender=InterCountyRoute)
+@receiver(m2m_changed, sender=InterCountyRoute.origins.through)
+@receiver(m2m_changed, sender=InterCountyRoute.destinations.through)
+@receiver([post_save, post_delete], sender=InterCountyWeightTier)
+@receiver([post_save, post_delete], sender=LastMileDeliveryPolicy)
+def rebuild_rate_cards(sender, instance, **kwargs):
+    transaction.on_commit(rate_cards.invalidate)
@@ -1,5 +1,6 @@
 import logging
 import datetime
+from collections import Counter
 from celery import shared_task
 from celery.exceptions import MaxRetriesExceededError
 from core.utils.services import *
@@ -7,13 +8,18 @@ from decimal import Decimal
 from django.utils import timezone
 
 from apps.deliveries.models import Package
+from apps.deliveries.dispatch import ROUNDS, get_round, select_riders
 from apps.payments.models import Invoice
 from apps.messaging.views import intracity_drivers_notification
-from apps.messaging.utils import send_notification
+from apps.messaging.utils import send_notification, notification
+from apps.messaging.tasks import fan_out_notifications
+from apps.messaging.outbox import publish, idempotent
 from django.db import transaction
 from core.utils.payments import NobukPayments
 from apps.messaging.utils import send_message
-from core.utils.emails import send_order_creation_email, send_order_creation_email_admin
+from django.core.cache import cache
+from core.utils.public_ids import bulk_create_with_public_ids
+from core.utils.emails import send_order_creation_email, send_order_creation_email_admin, send_import_email, send_import_email_admin
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +29,7 @@ ROUND_DELAY = 120
 
 
 @shared_task(name="apps.deliveries.tasks.process_package_invoice")
+@idempotent
 def process_package_invoice(package_id):
     try:
         package = Package.objects.get(id=package_id)
@@ -71,8 +78,66 @@ def process_package_invoice(package_id):
         return "Package not found"
 
 
+@shared_task(name="apps.deliveries.tasks.process_imported_packages")
+@idempotent
+def process_imported_packages(package_ids):
+    """process_package_invoice and the partner upload notices for a whole import at once."""
+    packages = list(Package.objects.filter(id__in=package_ids).select_related("created_by", "origin_office"))
+    if not packages:
+        return "No packages found"
+
+    user = packages[0].created_by
+    status = "unpaid" if user.account_type == "personal" else "pending"
+    invoiced = set(Invoice.objects.filter(package__in=packages).values_list("package_id", flat=True))
+
+    bulk_create_with_public_ids(Invoice, [
+        Invoice(user=user, package=package, amount=Decimal(round(package.fees or 0, 3)), status=status)
+        for package in packages if package.id not in invoiced
+    ], "invoice_id", "IN", batch_size=500)
+
+    for package in packages:
+        if package.delivery_type == "intra_city" or (package.delivery_type == "inter_county" and package.requires_pickup):
+            schedule_driver_notification(package)
+
+    notifications = [notification(user, "Packages imported", f"{len(packages)} packages were imported successfully.")]
+    if user.role == "partner_shop":
+        counts = Counter(package.origin_office_id for package in packages if package.origin_office_id)
+        for manager in User.objects.filter(role="manager", office_id__in=counts).select_related("office"):
+            notifications.append(notification(
+                manager,
+                "New Partner Packages",
+                f"{user.full_name} uploaded {counts[manager.office_id]} packages at {manager.office.name}.",
+            ))
+    fan_out_notifications(notifications)
+
+    cache.delete(f"user_packages_{user.id}")
+
+    send_import_email(user, packages)
+    send_import_email_admin(user, packages)
+
+    return f"Processed {len(packages)} imported packages"
+
+
+
+def schedule_driver_notification(package):
+    eta = None
+    if package.pickup_date:
+        eta = timezone.make_aware(package.pickup_date) if timezone.is_naive(package.pickup_date) else package.pickup_date
+        if eta <= timezone.now():
+            eta = None
+
+    publish(
+        "apps.deliveries.tasks.send_intracity_notifications",
+        args=[str(package.id)],
+        eta=eta,
+        key=f"package:{package.id}:driver_notifications",
+    )
+
+
+
 @shared_task(bind=True, max_retries=2, default_retry_delay=60)
-def send_intracity_notifications(self, package_id, round_number=1, total_rounds=2):
+@idempotent
+def send_intracity_notifications(self, package_id, round_number=1, total_rounds=len(ROUNDS)):
     try:
         package = Package.objects.select_related("origin_office").get(id=package_id)
     except Package.DoesNotExist:
@@ -97,7 +162,9 @@ def send_intracity_notifications(self, package_id, round_number=1, total_rounds=
         return
 
     
-    drivers = get_nearby_drivers(pickup_coords, radius_km=10)
+    # the best riders not yet contacted, from a wider radius each round
+    radius_km, _ = get_round(round_number)
+    drivers = select_riders(package.id, pickup_coords, round_number)
     if drivers:
         intracity_drivers_notification(
             drivers=drivers,
@@ -105,20 +172,22 @@ def send_intracity_notifications(self, package_id, round_number=1, total_rounds=
             body=f"Pickup at {package.sender_address}",
             data={"type": "new_order", "order_id": str(package.id)},
         )
-        logger.info(f"📣 Round {round_number}: notified {len(drivers)} drivers for {package.package_id}")
+        logger.info(f"📣 Round {round_number}: notified {len(drivers)} drivers within {radius_km} km for {package.package_id}")
     else:
-        logger.warning(f"⚠️ Round {round_number}: no drivers nearby for {package.package_id}")
+        logger.warning(f"⚠️ Round {round_number}: no new drivers within {radius_km} km for {package.package_id}")
 
     
     if round_number < total_rounds:
+        # nobody to wait for, so widen straight away
+        delay = ROUND_DELAY if drivers else 0
         transaction.on_commit(
             lambda: send_intracity_notifications.apply_async(
-                args=[package.id, round_number + 1, total_rounds], countdown=ROUND_DELAY
+                args=[package.id, round_number + 1, total_rounds], countdown=delay
             )
         )
         logger.info(
             f"⏱ Scheduled next notification round ({round_number + 1}/{total_rounds}) "
-            f"for {package.package_id} in {ROUND_DELAY}s"
+            f"for {package.package_id} in {delay}s"
         )
     else:
         transaction.on_commit(
@@ -154,22 +223,20 @@ def _escalate_to_manager(package):
         logger.warning(f"⚠️ No origin office for {package.package_id}, cannot escalate.")
         return
 
-    managers = User.objects.filter(role__iexact="manager", office=package.origin_office)
-    if not managers.exists():
+    managers = list(User.objects.filter(role__iexact="manager", office=package.origin_office).values_list("id", flat=True))
+    if not managers:
         logger.warning(f"⚠️ No managers found for office {package.origin_office}.")
         return
 
-    for manager in managers:
-        try:
-            send_notification(
-                user=manager,
-                title="⚠️ No Driver Accepted Order",
-                message=f"No driver accepted delivery of {package.package_id}. Please assign manually.",
-                package=package
-            )
-            logger.info(f"📤 Escalation notification sent to manager {manager.id}")
-        except Exception as e:
-            logger.exception(f"❌ Failed to send escalation notification to manager {manager.id}: {e}")
-
-    logger.warning(f"🚨 Escalated to {managers.count()} manager(s) for package {package.package_id}")
+    # already off the request path, so insert directly rather than queueing another task
+    fan_out_notifications([
+        notification(
+            manager,
+            "⚠️ No Driver Accepted Order",
+            f"No driver accepted delivery of {package.package_id}. Please assign manually.",
+            package=package
+        )
+        for manager in managers
+    ])
 
+    logger.warning(f"🚨 Escalated to {len(managers)} manager(s) for package {package.package_id}")
@@ -0,0 +1,136 @@
+import datetime
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.deliveries.models import ShipmentStage, StageTrack
+
+
+# coordinates are stored in 1e-5 degrees (about a metre), times in whole seconds
+COORD_SCALE = 10 ** 5
+
+# stages whose rider is still on the road
+ACTIVE_STAGE_STATUSES = ["created", "assigned", "in_transit", "with_courier", "handover"]
+
+
+def encode_values(values):
+    """Signed integers in the encoded-polyline scheme: zigzag, then 5-bit groups as printable ASCII."""
+    chunks = []
+    for value in values:
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def decode_values(text):
+    values, value, shift = [], 0, 0
+    for char in text:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    return values
+
+
+def encode_points(points, last=(0, 0, 0)):
+    """
+    Encodes (epoch_seconds, lat, lng) points as deltas from last, which is
+    the previous point in scaled integers. Returns (text, new_last).
+    """
+    values = []
+    last_time, last_lat, last_lng = last
+    for timestamp, lat, lng in points:
+        time, lat, lng = int(timestamp), round(float(lat) * COORD_SCALE), round(float(lng) * COORD_SCALE)
+        values += [time - last_time, lat - last_lat, lng - last_lng]
+        last_time, last_lat, last_lng = time, lat, lng
+    return encode_values(values), (last_time, last_lat, last_lng)
+
+
+def decode_points(text):
+    """[(epoch_seconds, lat, lng)] from an encoded track."""
+    values = decode_values(text)
+    points, time, lat, lng = [], 0, 0, 0
+    for i in range(0, len(values) - 2, 3):
+        time, lat, lng = time + values[i], lat + values[i + 1], lng + values[i + 2]
+        points.append((time, lat / COORD_SCALE, lng / COORD_SCALE))
+    return points
+
+
+def downsample(points, max_points):
+    """At most max_points, evenly spaced through the track, always keeping the first and last."""
+    if not max_points or len(points) <= max_points:
+        return points
+    if max_points < 2:
+        return points[-1:]
+
+    step = (len(points) - 1) / (max_points - 1)
+    return [points[round(i * step)] for i in range(max_points)]
+
+
+def read_track(track, since=None, until=None, max_points=None):
+    """A track's points between the since and until epoch seconds, downsampled for replay."""
+    points = decode_points(track.points)
+    if since is not None or until is not None:
+        points = [
+            point for point in points
+            if (since is None or point[0] >= since) and (until is None or point[0] <= until)
+        ]
+    return downsample(points, max_points)
+
+
+def timestamp_to_datetime(timestamp):
+    return datetime.datetime.fromtimestamp(int(timestamp), tz=datetime.timezone.utc)
+
+
+def record_positions(positions):
+    """
+    Appends buffered (driver_id, lat, lng, last_seen) positions to the track
+    of each rider's active stages, creating tracks as needed.
+    """
+    by_driver = {str(driver_id): (last_seen, lat, lng) for driver_id, lat, lng, last_seen in positions if last_seen}
+    stage_ids = {}
+    for stage_id, driver_id in ShipmentStage.objects.filter(
+        driver_id__in=by_driver, status__in=ACTIVE_STAGE_STATUSES, completed_at__isnull=True,
+    ).values_list("id", "driver_id"):
+        stage_ids[stage_id] = str(driver_id)
+    if not stage_ids:
+        return 0
+
+    with transaction.atomic():
+        tracks = {track.shipment_stage_id: track for track in StageTrack.objects.select_for_update().filter(shipment_stage_id__in=stage_ids)}
+        created, updated = [], []
+
+        for stage_id, driver_id in stage_ids.items():
+            point = by_driver[driver_id]
+            track = tracks.get(stage_id)
+
+            if track is None:
+                track = StageTrack(shipment_stage_id=stage_id, started_at=timestamp_to_datetime(point[0]))
+                created.append(track)
+            elif int(point[0]) <= track.last_time:
+                continue
+            else:
+                updated.append(track)
+
+            text, (track.last_time, track.last_lat, track.last_lng) = encode_points([point], (track.last_time, track.last_lat, track.last_lng))
+            track.points += text
+            track.point_count += 1
+            track.ended_at = timestamp_to_datetime(point[0])
+
+        StageTrack.objects.bulk_create(created)
+        StageTrack.objects.bulk_update(updated, ["points", "point_count", "ended_at", "last_time", "last_lat", "last_lng"])
+
+    return len(created) + len(updated)
+
+
+def prune(days=None):
+    """Deletes tracks that ended more than TRACK_RETENTION_DAYS ago."""
+    cutoff = timezone.now() - timedelta(days=days or settings.TRACK_RETENTION_DAYS)
+    deleted, _ = StageTrack.objects.filter(ended_at__lt=cutoff).delete()
+    return deleted
@@ -1,6 +1,6 @@
 from django.urls import path
 from apps.deliveries.views import *
-from apps.deliveries.prints import generate_shipment_pdf, generate_package_pdf
+from apps.deliveries.prints import generate_shipment_pdf, generate_package_pdf, package_qr_code, shipment_qr_code
 
 
 urlpatterns = [
@@ -14,10 +14,15 @@ urlpatterns = [
     path( "user_package_details/<slug:slug>/", CustomerPackageRetrieveEditDeleteView.as_view(), name="user_package_details", ),
     path( "intracity_pricing/", IntraCityPriceCalculationView.as_view(), name="intracity_pricing", ),
     path( "intercounty_pricing/", InterCountyPriceCalculator.as_view(), name="intercounty_pricing"), 
+    path( "bulk_pricing/", BulkQuoteView.as_view(), name="bulk_pricing"), 
+    path( "import_packages/", PackageImportView.as_view(), name="import_packages"), 
+    path( "shipments/<str:shipment_id>/track/", ShipmentTrackView.as_view(), name="shipment_track"), 
 
 
     # print urls
     path("shipments/print/", generate_shipment_pdf, name="generate_shipment_pdf", ),
     path("packages/print/", generate_package_pdf, name="generate_package_pdf", ),
+    path("packages/qr/<str:package_id>.<str:fmt>", package_qr_code, name="package_qr_code", ),
+    path("shipments/qr/<str:shipment_id>.<str:fmt>", shipment_qr_code, name="shipment_qr_code", ),
 ]
 
@@ -1,19 +1,6 @@
-import googlemaps
-from django.conf import settings
 from decimal import Decimal
 from apps.deliveries.models import VehicleType, VehiclePricing
-
-
-gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
-
-
-def get_road_distance_km(origin, destination):
-    result = gmaps.distance_matrix(origins=[origin], destinations=[destination], mode="driving")
-    try:
-        distance_meters = result['rows'][0]['elements'][0]['distance']['value']  # meters
-        return round(Decimal(distance_meters) / 1000, 2)  # km
-    except Exception:
-        return None
+from core.utils.maps import get_road_distance_km
 
 
 
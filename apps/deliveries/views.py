@@ -1,5 +1,4 @@
 import math
-import googlemaps
 from django.shortcuts import render
 from django.db.models import Q
 from django.conf import settings
@@ -14,19 +13,19 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.response import Response
 
-from geopy.distance import geodesic
 from decimal import Decimal, ROUND_HALF_UP
 
 from apps.accounts.models import *
 from apps.accounts.permissions import *
 from apps.deliveries.models import *
 from apps.deliveries.serializers import *
+from apps.deliveries.quotes import *
+from apps.deliveries.imports import read_rows, import_packages, PackageImportError
+from apps.deliveries.tracking import read_track
 from apps.payments.models import *
 from core.utils.payments import NobukPayments
 from core.utils.emails import send_order_creation_email
 
-
-gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
 # Create your views here.
 
 
@@ -185,55 +184,10 @@ class CustomerPackageRetrieveEditDeleteView(generics.RetrieveUpdateDestroyAPIVie
 
 
 
-def get_road_distance_km(origin, destination):
-   
-    try:
-        result = gmaps.distance_matrix(origins=[origin], destinations=[destination], mode="driving", units="metric")
-        element = result['rows'][0]['elements'][0]
-
-        if element.get('status') != 'OK':
-            return None
-        
-        distance_meters = element['distance']['value']
-        return round(Decimal(distance_meters) / 1000, 2)
-    except Exception:
-        return None
-
-
-
-def calculate_volumetric_weight(length_cm, width_cm, height_cm, divisor=6000):
-    return (length_cm * width_cm * height_cm ) / divisor
-
-
-def calculate_chargeable_weight(actual_weight_kg, length_cm, width_cm, height_cm):
-    volumetric_weight = calculate_volumetric_weight(length_cm, width_cm, height_cm)
-    return max(actual_weight_kg, volumetric_weight)
-
-
-def is_within_region(lat, lng, center_lat, center_lng, radius_km):
-    origin = f"{center_lat},{center_lng}"
-    destination = f"{lat},{lng}"
-
-    try:
-        result = gmaps.distance_matrix(origins=[origin], destinations=[destination], mode="driving", units="metric")
-        element = result['rows'][0]['elements'][0] 
-
-        if element.get('status') != 'OK':
-            return False
-        
-        distance_meters = element['distance']['value']
-        distance_km = Decimal(distance_meters) / 1000
-
-        return distance_km <= Decimal(radius_km)
-    except Exception as e:
-        return False
-
-
 class IntraCityPriceCalculationView(APIView):
 
     def post(self, request):
         data = request.data
-        print(data)
         try:
             
             weight = Decimal(data.get("weight", 0))
@@ -247,103 +201,13 @@ class IntraCityPriceCalculationView(APIView):
             if not sender_latLng or not recipient_latLng:
                 return Response({"success": False, "message": "Sender and recipient locations are required."})
 
-            sender_coords = tuple(round(float(coord), 5) for coord in sender_latLng.split(","))
-            recipient_coords = tuple(round(float(coord), 5) for coord in recipient_latLng.split(","))
-
-            distance_km = get_road_distance_km(sender_coords, recipient_coords)
-            if distance_km is None:
-                return Response({ "success": False, "message": "Failed to calculate road distance." }, status=500)
+            sender_coords = parse_latlng(sender_latLng)
+            recipient_coords = parse_latlng(recipient_latLng)
 
+            return Response(quote_intracity(weight, length, width, height, sender_coords, recipient_coords))
 
-            # Policy checks
-            valid_policy = None
-            
-            for policy in IntraCityParcelPolicy.objects.select_related("office"):
-                office = policy.office
-
-                if not (office.geo_lat and office.geo_lng):
-                    continue
-
-                lat_c, lng_c = float(office.geo_lat), float(office.geo_lng)
-                sender_in_radius = is_within_region(
-                    sender_coords[0], sender_coords[1], lat_c, lng_c, policy.radius_km
-                )
-                recipient_in_radius = is_within_region(
-                    recipient_coords[0], recipient_coords[1], lat_c, lng_c, policy.radius_km
-                )
-
-                if sender_in_radius or recipient_in_radius:
-                    valid_policy = policy
-                    break
-
-            if not valid_policy:
-                return Response({
-                    "success": False,
-                    "message": "Pickup and dropoff must be within the same intracity zone."
-
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            policy = valid_policy
-
-            if weight > policy.max_weight:
-                size_category_name = "package"
-            else:
-                size_category_name = "parcel"
-            
-            if size_category_name == "parcel":
-                if distance_km > policy.max_distance_km:
-                    return Response({
-                        "success": False,
-                        "message": "Distance exceeds max intracity coverage."
-                    }, status=400)
-                
-                if distance_km <= policy.base_km:
-                    price = policy.base_price
-                else:
-                    extra_km =  Decimal(distance_km) -policy.base_km
-                    price = policy.base_price + (extra_km * policy.extra_price_per_km)
-
-                    return Response({
-                        "success": True,
-                        "distance_km": round(distance_km, 2),
-                        "total_fee": round(price),
-                        "size_category": "1" if size_category_name == "parcel" else "2"
-                    })
-                
-             
-            if size_category_name == "package":
-                chargeable_weight = calculate_chargeable_weight(weight, length, width, height)
-                chargeable_weight = Decimal(chargeable_weight)
-
-                package_policy = IntraCityPackagePricing.objects.filter(
-                    office=policy.office,
-                    min_weight__lte=chargeable_weight,
-                    max_weight__gte=chargeable_weight,
-                    min_distance__lte=distance_km,
-                    max_distance__gte=distance_km
-                ).first()
-
-
-
-                if not package_policy:
-                    return Response({
-                        "success": False,
-                        "message": "No package pricing rule for this weight and distance bracket."
-                    }, status=400)
-
-                price = package_policy.price
-
-                return Response({
-                    "success": True,
-                    "distance_km": round(distance_km, 2),
-                    "total_fee": round(price),
-                    "size_category": "1" if size_category_name == "parcel" else "2"
-                })
-            
-            return Response({
-                "success": False,
-                "message": "Invalid size_category."
-            }, status=400)
+        except QuoteError as e:
+            return Response({"success": False, "message": e.message}, status=e.status)
 
         except Exception as e:
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -370,155 +234,140 @@ class InterCountyPriceCalculator(APIView):
                 return Response({ "success": False, "message": "Missing coordinates." })
 
             # convert to coordinates tuples
-            sender_coords =  tuple(round(float(coord), 5) for coord in sender_latLng.split(","))
-            recipient_coords = tuple(round(float(coord), 5) for coord in recipient_latLng.split(","))
+            sender_coords = parse_latlng(sender_latLng)
+            recipient_coords = parse_latlng(recipient_latLng)
 
-            # get nearest offices
-            origin_office = get_nearest_office(sender_coords)
-            destination_office = get_nearest_office(recipient_coords)
+            return Response(quote_intercounty(
+                weight, length, width, height, sender_coords, recipient_coords, requires_pickup, requires_last_mile
+            ))
 
-            if not origin_office or not destination_office:
-                return Response({ "success": False, "message": "Could not resolve nearest offices." }, status=404)
-            
-            # Calculate chargeable weight
-            chargeable_weight = calculate_chargeable_weight(weight, length, width, height)
-            
-            # Auto-determine size_category
-            size_category_name = "package" if chargeable_weight > Decimal("50.99") else "parcel"
-            size_category = SizeCategory.objects.filter(name__iexact=size_category_name).first()
+        except QuoteError as e:
+            return Response({"success": False, "message": e.message}, status=e.status)
 
-            if not size_category:
-                return Response({ "success": False, "message": f"No size category found for {size_category_name}"}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e: 
+            return Response({"success": False, "message": str(e)}, status=500)
 
 
-            route, _ = InterCountyRoute.get_or_create_bidirectional(
-                origin_office=origin_office,
-                destination_office=destination_office,
-                size_category=size_category
-            )
 
-            if not route:
-                return Response({ "success": False, "message": "No intercounty route pricing found for selected path."}),
+class BulkQuoteView(APIView):
+    permission_classes = [ IsAuthenticated ]
 
+    def post(self, request):
+        shipments = request.data.get("shipments")
 
-            # Base/intercounty price
-            tier = InterCountyWeightTier.objects.filter(
-                route=route,
-                min_weight__lte=chargeable_weight,
-                max_weight__gte=chargeable_weight,
-            ).first()
+        if not isinstance(shipments, list) or not shipments:
+            return Response({ "success": False, "message": "shipments must be a non-empty list." }, status=status.HTTP_400_BAD_REQUEST)
 
-            if not tier:
-                return Response({ "success": False, "message": "No matching intercounty tier for this weight and route."}, status=status.HTTP_404_NOT_FOUND)
+        if len(shipments) > settings.BULK_QUOTE_MAX_SHIPMENTS:
+            return Response({
+                "success": False,
+                "message": f"At most {settings.BULK_QUOTE_MAX_SHIPMENTS} shipments can be quoted at once."
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            base_fee = tier.price_per_kg if tier.min_weight == 0 else (tier.price_per_kg * chargeable_weight)
+        if not all(isinstance(shipment, dict) for shipment in shipments):
+            return Response({ "success": False, "message": "Each shipment must be an object." }, status=status.HTTP_400_BAD_REQUEST)
 
-            
+        return Response({ "success": True, "results": quote_many(shipments) })
 
-            # pickup fee
-            pickup_fee = Decimal("0.00")
-            if requires_pickup and origin_office.enable_pickup:
-                pickup_distance_km = get_road_distance_km(sender_coords, (float(origin_office.geo_lat), float(origin_office.geo_lng)))
-                pickup_distance_km = Decimal(round(pickup_distance_km, 2))
-                
-                
-                free_km = origin_office.pickup_first_free_kms
-                if pickup_distance_km <= free_km:
-                    pickup_fee = Decimal("0.00")
-                
-                else:
-                    chargeable_distance = pickup_distance_km - free_km
 
-                    if size_category_name == "package":
-                        intracity = IntraCityPackagePricing.objects.filter(
-                            min_weight__lte=chargeable_weight,
-                            max_weight__gte =chargeable_weight,
-                            min_distance__lte=chargeable_distance,
-                            max_distance__gte=chargeable_distance,
-                        ).first()
 
-                        if intracity:
-                            pickup_fee = intracity.price
 
-                    else:
-                        intracity_policy = IntraCityParcelPolicy.objects.filter(
-                            office=origin_office
-                        ).first()
 
-                        if intracity_policy:
+class PackageImportView(APIView):
+    permission_classes = [ IsAuthenticated, IsBusinessOrPartner ]
 
-                            if chargeable_distance <= intracity_policy.base_km:
-                                pickup_fee = intracity_policy.base_price
-                            else:
-                                extra_km = chargeable_distance - intracity_policy.base_km
-                                pickup_fee = intracity_policy.base_price + (extra_km * intracity_policy.extra_price_per_km)
+    def post(self, request):
+        upload = request.FILES.get("file")
 
-                
-            # Last mile
-            last_mile_fee = Decimal("0.00")
-            if requires_last_mile:
-                last_mile_fee = self.get_lastmile_price(destination_office, recipient_coords)
-
-            total_fee = base_fee + pickup_fee + last_mile_fee
-
-            response = Response({
-                "success": True,
-                "pickup_fee": pickup_fee,
-                "base_fee": base_fee,
-                "last_mile_fee": last_mile_fee,
-                "total_fee": total_fee,
-                "origin_office_id": origin_office.id,
-                "destination_office_id": destination_office.id,
-                "chargeable_weight": round(chargeable_weight, 2),
-                "size_category": "1" if size_category_name == "parcel" else "2"
-            })
-            
+        try:
+            if upload:
+                rows = read_rows(upload, upload.name)
+            else:
+                rows = request.data if isinstance(request.data, list) else request.data.get("packages")
 
-            return response
-        
-        except Exception as e: 
-            return Response({"success": False, "message": str(e)}, status=500)
+            if not isinstance(rows, list) or not rows:
+                return Response({ "success": False, "message": "Upload a CSV or JSON file, or send a list of packages." }, status=status.HTTP_400_BAD_REQUEST)
+            if not all(isinstance(row, dict) for row in rows):
+                return Response({ "success": False, "message": "Each package must be an object." }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Last_mile calculator
-    def get_lastmile_price(self, office, recipient_coords):
-        try:
-            
-            policy = office.last_mile_policy 
-        except LastMileDeliveryPolicy.DoesNotExist:
-            return Decimal("0.00") 
-        
-        office_coord = (float(office.geo_lat),float(office.geo_lng))
-        
-        distance_km = get_road_distance_km(office_coord, recipient_coords)
-        distance_km = Decimal(round(distance_km, 2))
+            packages, errors = import_packages(rows, request.user)
+        except PackageImportError as e:
+            return Response({ "success": False, "message": str(e) }, status=status.HTTP_400_BAD_REQUEST)
 
-        if distance_km <= policy.free_within_km:
-            return Decimal("0.00")
+        if errors:
+            return Response({
+                "success": False,
+                "message": "Some rows are invalid, nothing was imported.",
+                "errors": errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        
-        extra_km = distance_km - policy.free_within_km
-        
-        return extra_km * policy.per_km_fee
+        return Response({
+            "success": True,
+            "message": f"{len(packages)} packages imported.",
+            "package_ids": [package.package_id for package in packages],
+        }, status=status.HTTP_201_CREATED)
 
 
 
 
 
-def get_nearest_office(coords):
-    offices = Office.objects.all()
 
-    nearest = None
-    min_distance = float("inf")
 
-    for office in offices:
+
+
+class ShipmentTrackView(APIView):
+    permission_classes = [ IsAuthenticated ]
+
+    # points per stage for map replay unless max_points asks otherwise
+    DEFAULT_MAX_POINTS = 500
+    MAX_POINTS = 5000
+
+    def can_view(self, user, shipment):
+        """Admins, the shipment's manager and riders, and the owners of its packages."""
+        if user.role == "admin" or user.id in (shipment.manager_id, shipment.courier_id):
+            return True
+        return (
+            shipment.stages.filter(driver=user).exists()
+            or shipment.packages.filter(Q(created_by=user) | Q(sender_user=user)).exists()
+        )
+
+    def get(self, request, shipment_id):
         try:
-            distance = geodesic(coords, (float(office.geo_lat), float(office.geo_lng))).km
-            if distance < min_distance:
-                min_distance = distance
-                nearest = office
-        except Exception:
-            continue
+            since = int(request.query_params["since"]) if "since" in request.query_params else None
+            until = int(request.query_params["until"]) if "until" in request.query_params else None
+            max_points = int(request.query_params.get("max_points", self.DEFAULT_MAX_POINTS))
+            stage = int(request.query_params["stage"]) if "stage" in request.query_params else None
+        except ValueError:
+            return Response({ "success": False, "message": "stage, since, until and max_points must be integers." }, status=status.HTTP_400_BAD_REQUEST)
+
+        max_points = min(max(max_points, 2), self.MAX_POINTS)
+
+        shipment = Shipment.objects.filter(shipment_id=shipment_id).first()
+        if shipment is None:
+            return Response({ "success": False, "message": "Shipment not found." }, status=status.HTTP_404_NOT_FOUND)
+        if not self.can_view(request.user, shipment):
+            return Response({ "success": False, "message": "You don't have access to this shipment." }, status=status.HTTP_403_FORBIDDEN)
 
-    return nearest
+        tracks = StageTrack.objects.filter(shipment_stage__shipment=shipment).select_related("shipment_stage").order_by("shipment_stage__stage_number")
+        if stage is not None:
+            tracks = tracks.filter(shipment_stage__stage_number=stage)
 
+        tracks = list(tracks)
+        if not tracks:
+            return Response({ "success": False, "message": "No track recorded for this shipment." }, status=status.HTTP_404_NOT_FOUND)
 
+        return Response({
+            "shipment_id": shipment_id,
+            "stages": [
+                {
+                    "stage_number": track.shipment_stage.stage_number,
+                    "driver": track.shipment_stage.driver_id,
+                    "started_at": track.started_at,
+                    "ended_at": track.ended_at,
+                    "point_count": track.point_count,
+                    # [epoch_seconds, lat, lng]
+                    "points": read_track(track, since, until, max_points),
+                }
+                for track in tracks
+            ],
+        })
@@ -0,0 +1,170 @@
+import time
+import logging
+import redis
+from django.conf import settings
+
+from core.utils.geo import distance_km
+
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPositionStore:
+    """
+    Live rider positions kept in a Redis GEO set, with a sorted set of
+    last-seen timestamps so positions older than max_age drop out of searches.
+    It is also the write buffer for DriverLocation: riders that moved are
+    collected in a dirty set and written to the database in bulk.
+    """
+
+    geo_key = "drivers:positions"
+    seen_key = "drivers:last_seen"
+    dirty_key = "drivers:dirty"
+    flush_key = "drivers:flush_scheduled"
+
+    def __init__(self, url=None, max_age=None):
+        self.url = url
+        self.max_age = max_age
+        self._client = None
+
+
+    @property
+    def client(self):
+        if self._client is None:
+            url = self.url or settings.DRIVER_POSITIONS_REDIS_URL
+            self._client = redis.Redis.from_url(url, decode_responses=True)
+        return self._client
+
+
+    def get_max_age(self):
+        return self.max_age or settings.DRIVER_POSITION_MAX_AGE_SECONDS
+
+
+    def update(self, driver_id, lat, lng, timestamp=None):
+        """
+        Records a ping. Moves shorter than DRIVER_LOCATION_MIN_MOVE_METERS
+        only refresh last-seen. Returns False when Redis is unavailable, so
+        the caller can write the position to the database itself.
+        """
+        member = str(driver_id)
+        lat, lng = float(lat), float(lng)
+        timestamp = timestamp or time.time()
+
+        try:
+            previous = self.client.geopos(self.geo_key, member)[0]
+            moved = previous is None or distance_km((previous[1], previous[0]), (lat, lng)) * 1000 >= settings.DRIVER_LOCATION_MIN_MOVE_METERS
+
+            pipe = self.client.pipeline()
+            pipe.zadd(self.seen_key, {member: timestamp})
+            if moved:
+                pipe.geoadd(self.geo_key, (lng, lat, member))
+                pipe.sadd(self.dirty_key, member)
+                pipe.set(self.flush_key, 1, nx=True, ex=settings.DRIVER_LOCATION_FLUSH_SECONDS)
+            results = pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Failed to store position for driver {member}: {e}")
+            return False
+
+        # the first mover after a flush schedules the next one
+        if moved and results[-1]:
+            from apps.drivers.tasks import flush_driver_locations
+            flush_driver_locations.apply_async(countdown=settings.DRIVER_LOCATION_FLUSH_SECONDS)
+        return True
+
+
+    def get(self, driver_id):
+        """(lat, lng, last_seen) of a live position, or None. Raises redis.RedisError."""
+        member = str(driver_id)
+        pipe = self.client.pipeline()
+        pipe.geopos(self.geo_key, member)
+        pipe.zscore(self.seen_key, member)
+        (position,), last_seen = pipe.execute()
+
+        if position is None or last_seen is None or last_seen < time.time() - self.get_max_age():
+            return None
+        return position[1], position[0], last_seen
+
+
+    def take_dirty(self):
+        """[(driver_id, lat, lng, last_seen)] for riders that moved since the last call."""
+        pipe = self.client.pipeline()
+        pipe.smembers(self.dirty_key)
+        pipe.delete(self.dirty_key)
+        members, _ = pipe.execute()
+        if not members:
+            return []
+
+        members = list(members)
+        pipe = self.client.pipeline()
+        pipe.geopos(self.geo_key, *members)
+        pipe.zmscore(self.seen_key, members)
+        positions, last_seen = pipe.execute()
+
+        return [
+            (member, position[1], position[0], seen)
+            for member, position, seen in zip(members, positions, last_seen)
+            if position is not None
+        ]
+
+
+    def mark_dirty(self, driver_ids):
+        if driver_ids:
+            self.client.sadd(self.dirty_key, *driver_ids)
+
+
+    def remove(self, driver_id):
+        member = str(driver_id)
+        pipe = self.client.pipeline()
+        pipe.zrem(self.geo_key, member)
+        pipe.zrem(self.seen_key, member)
+        pipe.execute()
+
+
+    def prune(self):
+        cutoff = time.time() - self.get_max_age()
+        stale = self.client.zrangebyscore(self.seen_key, "-inf", cutoff)
+
+        if stale:
+            pipe = self.client.pipeline()
+            pipe.zrem(self.geo_key, *stale)
+            pipe.zrem(self.seen_key, *stale)
+            pipe.execute()
+        return len(stale)
+
+
+    def is_empty(self):
+        """True when no rider has a live position, as after a Redis restart."""
+        return not self.client.exists(self.geo_key)
+
+
+    def nearby(self, lat, lng, radius_km, limit=None):
+        """
+        Return [(driver_id, distance_km, last_seen)] within radius_km, closest
+        first. Raises redis.RedisError so callers can fall back to the database.
+        """
+        self.prune()
+
+        results = self.client.geosearch(
+            self.geo_key,
+            longitude=float(lng),
+            latitude=float(lat),
+            radius=radius_km,
+            unit="km",
+            sort="ASC",
+            count=limit,
+            withdist=True,
+        )
+        if not results:
+            return []
+
+        members = [member for member, _ in results]
+        last_seen = self.client.zmscore(self.seen_key, members)
+
+        return [
+            (member, float(distance), seen)
+            for (member, distance), seen in zip(results, last_seen)
+            if seen is not None
+        ]
+
+
+driver_positions = DriverPositionStore()
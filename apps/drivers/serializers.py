@@ -11,6 +11,17 @@ class DriverLocationSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "updated_at", "driver"]
 
 
+    def to_internal_value(self, data):
+        # devices send full-precision floats; the columns keep 6 decimal places
+        data = data.copy()
+        for field in ("latitude", "longitude"):
+            try:
+                data[field] = round(float(data[field]), 6)
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
     def create(self, validated_data):
         
         request = self.context.get("request")
@@ -75,9 +86,7 @@ class DriverShipmentSerializer(serializers.ModelSerializer):
 
     def get_qrcode_svg(self, obj):
         request = self.context.get("request")
-        if obj.qrcode_svg:
-            return request.build_absolute_uri(obj.qrcode_svg.url)
-        return None
+        return request.build_absolute_uri(obj.qr_url) if request else obj.qr_url
     
 
     def get_package(self, obj):
@@ -0,0 +1,12 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from apps.drivers.models import DriverDevice
+from apps.messaging.push import token_key
+
+
+@receiver([post_save, post_delete], sender=DriverDevice)
+def clear_cached_token(sender, instance, **kwargs):
+    key = token_key(instance.user_id)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -7,7 +7,10 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.db import transaction as db_transaction
 from django.utils import timezone
+from apps.accounts.models import User, DriverLocation
 from apps.drivers.models import Wallet, WalletTransaction
+from apps.drivers.positions import driver_positions
+from apps.deliveries.tracking import record_positions
 from core.utils.payments import NobukPayments
 
 
@@ -71,6 +74,37 @@ def send_withdrawal_request_to_nobuk(self, transaction_id):
 
 
 
+@shared_task(name="apps.drivers.tasks.flush_driver_locations")
+def flush_driver_locations():
+    """Writes the buffered positions of riders that moved to DriverLocation in one bulk upsert."""
+    dirty = driver_positions.take_dirty()
+    if not dirty:
+        return 0
 
+    riders = {str(user_id) for user_id in User.objects.filter(id__in=[driver_id for driver_id, *_ in dirty]).values_list("id", flat=True)}
+    locations = [
+        DriverLocation(
+            driver_id=driver_id,
+            latitude=Decimal(f"{lat:.6f}"),
+            longitude=Decimal(f"{lng:.6f}"),
+        )
+        for driver_id, lat, lng, _ in dirty if driver_id in riders
+    ]
 
+    try:
+        DriverLocation.objects.bulk_create(
+            locations,
+            update_conflicts=True,
+            unique_fields=["driver"],
+            update_fields=["latitude", "longitude", "updated_at"],
+            batch_size=500,
+        )
+    except Exception:
+        # put them back so the next flush retries
+        driver_positions.mark_dirty([location.driver_id for location in locations])
+        raise
+
+    # riders on a stage also extend its track
+    record_positions(dirty)
+    return len(locations)
 
@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404
-from geopy.distance import geodesic
+from django.utils import timezone
 
 from rest_framework import status, generics
 from rest_framework.views import APIView
@@ -12,6 +12,8 @@ from apps.drivers.models import *
 from apps.drivers.serializers import *
 from apps.accounts.models import User
 from apps.drivers.services import *
+from apps.drivers.positions import driver_positions
+from core.utils.services import get_rider_position
 from apps.drivers.tasks import send_withdrawal_request_to_nobuk
 
 
@@ -24,18 +26,18 @@ class TrackedCurrentLocationView(APIView):
         except User.DoesNotExist:
             return Response({ "success": False,  "message": "Rider not found."}, status=status.HTTP_404_NOT_FOUND)
         
-        try:
-            location = rider.location
-        except DriverLocation.DoesNotExist:
+        position = get_rider_position(rider)
+        if position is None:
             return Response({ "success": False, "message": "Location not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
+        lat, lng, updated_at = position
         data = {
             "rider_id": str(rider.id),
             "name": rider.full_name,
-            "lat": float(location.latitude),
-            "lng": float(location.longitude),
-            "updated_at": location.updated_at,
+            "lat": float(lat),
+            "lng": float(lng),
+            "updated_at": updated_at,
         }
         return Response(data, status=status.HTTP_200_OK)
 
@@ -87,17 +89,20 @@ class DriverLocationUpdate(generics.GenericAPIView):
     serializer_class = DriverLocationSerializer
 
     def post(self, request, *args, **kwargs):
-        
-        location, created = DriverLocation.objects.update_or_create(
-            driver=self.request.user,
-            defaults={
-                "latitude": request.data.get("latitude"),
-                "longitude": request.data.get("longitude"),
-            }
-        )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        latitude, longitude = serializer.validated_data["latitude"], serializer.validated_data["longitude"]
 
-        serializer = self.get_serializer(location)
-        return Response(serializer.data)
+        # pings go to the position buffer, which flushes riders that moved to the database in bulk
+        if driver_positions.update(self.request.user.id, latitude, longitude):
+            location = DriverLocation(driver=self.request.user, latitude=latitude, longitude=longitude, updated_at=timezone.now())
+        else:
+            location, created = DriverLocation.objects.update_or_create(
+                driver=self.request.user,
+                defaults={"latitude": latitude, "longitude": longitude}
+            )
+
+        return Response(self.get_serializer(location).data)
 
 
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FullloadsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.fullloads'
+
+
+    def ready(self):
+        import apps.fullloads.signals
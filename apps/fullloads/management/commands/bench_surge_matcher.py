@@ -0,0 +1,71 @@
+import random
+import string
+import timeit
+from django.core.management.base import BaseCommand
+
+from apps.fullloads.models import Surge
+from apps.fullloads.surges import SurgeMatcher
+
+
+def match_by_loop(surges, destination_name, weight_tier_id):
+    destination_name = destination_name.lower()
+
+    for surge in surges:
+        keywords = [k.strip().lower() for k in surge.locations.split(",") if k.strip()]
+        if any(keyword in destination_name for keyword in keywords):
+            if surge.weight_tiers_id == weight_tier_id:
+                return surge
+    return None
+
+
+def random_place(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+
+class Command(BaseCommand):
+    help = "Compare the surge loop with the compiled keyword matcher on synthetic surge rules."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000")
+        parser.add_argument("--keywords", type=int, default=3, help="locations per surge")
+        parser.add_argument("--tiers", type=int, default=5)
+        parser.add_argument("--lookups", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        lookups = options["lookups"]
+        tiers = list(range(1, options["tiers"] + 1))
+
+        self.stdout.write(f"{'surges':>8} {'loop ms/lookup':>16} {'matcher ms/lookup':>18} {'speedup':>9} {'build ms':>9} {'mismatches':>11}")
+
+        for size in [int(s) for s in options["sizes"].split(",")]:
+            places = [random_place(rng) for _ in range(size * options["keywords"])]
+            surges = [
+                Surge(id=pk, locations=", ".join(rng.sample(places, options["keywords"])), weight_tiers_id=rng.choice(tiers))
+                for pk in range(size)
+            ]
+
+            # half the destinations contain a surge keyword
+            queries = []
+            for _ in range(lookups):
+                name = f"{random_place(rng)} road, {random_place(rng)}"
+                if rng.random() < 0.5:
+                    name += f", {rng.choice(places).title()} town"
+                queries.append((name, rng.choice(tiers)))
+
+            build_time = timeit.timeit(lambda: SurgeMatcher(surges), number=1)
+            matcher = SurgeMatcher(surges)
+
+            mismatches = sum(
+                1 for name, tier in queries
+                if match_by_loop(surges, name, tier) is not matcher.match(name, tier)
+            )
+
+            loop_time = timeit.timeit(lambda: [match_by_loop(surges, name, tier) for name, tier in queries], number=1)
+            matcher_time = timeit.timeit(lambda: [matcher.match(name, tier) for name, tier in queries], number=1)
+
+            self.stdout.write(
+                f"{size:>8} {loop_time * 1000 / lookups:>16.4f} {matcher_time * 1000 / lookups:>18.4f} "
+                f"{loop_time / matcher_time:>8.1f}x {build_time * 1000:>9.1f} {mismatches:>11}"
+            )
@@ -1,10 +1,9 @@
-import random
-import string
 import uuid
 from django.db import models
 from apps.accounts.models import Office, User
 from django.utils.translation import gettext_lazy as _
-from geopy.distance import geodesic
+from core.utils.spatial import get_nearest_office
+from core.utils.public_ids import save_with_public_id
 # Create your models here.
 
 
@@ -60,9 +59,6 @@ class VehiclePricing(models.Model):
     def __str__(self):
         return f"{self.vehicle.name} | {self.weight.name} | {self.band.name}"
     
-def generateID(pref):
-    random_id = "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
-    return f"{pref}{random_id}"
 
 class Booking(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False, unique=True)
@@ -81,13 +77,6 @@ class Booking(models.Model):
 
 
     def save(self, *args, **kwargs):
-        if not self.booking_id:
-            while True:
-                new_id = generateID("FL")
-                if not Booking.objects.filter(booking_id=new_id).exists():
-                    self.booking_id = new_id
-                    break
-
         if not self.origin_office:
             try: 
                 lat, lng = map(float, self.pickup_latLng.split(","))
@@ -96,25 +85,12 @@ class Booking(models.Model):
             except Exception as e:
                 print(f"Error parsing sender coordinates: {e}")
 
-        super().save(*args, **kwargs)
+        save_with_public_id(self, "booking_id", "FL", super().save, *args, **kwargs)
 
 
     @staticmethod
     def get_nearest_office(lat, lng):
-        offices = Office.objects.all()
-        package_coords = (float(lat), float(lng))
-
-        nearest = None
-        min_distance = float("inf")
-
-        for office in offices:
-            office_coords = (float(office.geo_lat), float(office.geo_lng))
-            distance = geodesic(package_coords, office_coords).km
-
-            if distance < min_distance:
-                min_distance = distance
-                nearest = office
-        return nearest
+        return get_nearest_office((lat, lng))
 
 
     def __str__(self):
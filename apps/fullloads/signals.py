@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from apps.fullloads.models import VehicleType, DistanceBand, WeightTier, VehiclePricing, Surge
+from apps.fullloads.surges import surge_matcher
+from core.utils.ratecards import rate_cards
+
+
+@receiver([post_save, post_delete], sender=VehicleType)
+@receiver([post_save, post_delete], sender=DistanceBand)
+@receiver([post_save, post_delete], sender=WeightTier)
+@receiver([post_save, post_delete], sender=VehiclePricing)
+def rebuild_rate_cards(sender, instance, **kwargs):
+    transaction.on_commit(rate_cards.invalidate)
+
+
+
+@receiver([post_save, post_delete], sender=Surge)
+def rebuild_surge_matcher(sender, instance, **kwargs):
+    transaction.on_commit(surge_matcher.invalidate)
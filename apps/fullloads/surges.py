@@ -0,0 +1,38 @@
+from apps.fullloads.models import Surge
+from core.utils.indexes import VersionedIndex
+from core.utils.keywords import KeywordMatcher
+
+
+def surge_keywords(surge):
+    return [keyword.strip().lower() for keyword in surge.locations.split(",") if keyword.strip()]
+
+
+class SurgeMatcher:
+    """
+    Active surges compiled into one keyword automaton per weight tier. When
+    several surges match a destination the one loaded first wins, as with
+    the old loop over the queryset.
+    """
+
+    def __init__(self, surges):
+        self.surges = [surge for surge in surges if surge.weight_tiers_id is not None]
+
+        keywords = {}
+        for rank, surge in enumerate(self.surges):
+            for keyword in surge_keywords(surge):
+                keywords.setdefault(surge.weight_tiers_id, []).append((keyword, rank))
+
+        self.matchers = {tier_id: KeywordMatcher(pairs) for tier_id, pairs in keywords.items()}
+
+
+    def match(self, destination_name, weight_tier_id):
+        matcher = self.matchers.get(weight_tier_id)
+        if matcher is None:
+            return None
+
+        rank = matcher.first_match(destination_name.lower())
+        return self.surges[rank] if rank is not None else None
+
+
+
+surge_matcher = VersionedIndex("surges", lambda: SurgeMatcher(Surge.objects.filter(is_active=True).order_by("id")))
@@ -13,6 +13,8 @@ from apps.accounts.permissions import IsClient
 from apps.fullloads.models import *
 from apps.fullloads.serializers import *
 from core.utils.services import get_road_distance_km
+from core.utils.ratecards import rate_cards
+from apps.fullloads.surges import surge_matcher
 from core.utils.payments import NobukPayments
 # Create your views here.
 
@@ -37,16 +39,7 @@ def find_matching_surge(destination_name, weight_tier):
     if weight_tier is None:
         return None
 
-    destination_name = destination_name.lower()
-    surges = Surge.objects.filter(is_active=True)
-
-    for surge in surges:
-        keywords = [k.strip().lower() for k in surge.locations.split(",")]
-        if any(keyword in destination_name for keyword in keywords):
-            if surge.weight_tiers and surge.weight_tiers.id == weight_tier.id:
-                return surge
-
-    return None
+    return surge_matcher.get().match(destination_name, weight_tier.id)
 
 
 
@@ -82,27 +75,28 @@ class CalculateFullloadPrice(APIView):
             return Response({"success": False, "message": "Failed to calculate road distance"}, status=400)
 
         
-        band = DistanceBand.objects.filter(min_km__lte=distance_km, max_km__gte=distance_km).first()
+        rate_card = rate_cards.get()
+
+        band = rate_card.distance_band(distance_km)
         if not band:
             return Response({"success": False, "message": "No pricing band for this distance"}, status=404)
 
         
-        weight_tier = WeightTier.objects.filter(min_weight__lte=weight, max_weight__gte=weight).first()
+        weight_tier = rate_card.weight_tier(weight)
         if not weight_tier:
             return Response({"success": False, "message": "No weight tier for this weight"}, status=404)
 
         
         try:
-            vehicle = VehicleType.objects.get(id=vehicle_id)
-        except VehicleType.DoesNotExist:
+            vehicle = rate_card.vehicle(int(vehicle_id))
+        except (TypeError, ValueError):
+            vehicle = None
+
+        if not vehicle:
             return Response({"success": False, "message": "Invalid vehicle"}, status=404)
 
         
-        rate = VehiclePricing.objects.filter(
-            vehicle=vehicle,
-            band=band,
-            weight=weight_tier
-        ).first()
+        rate = rate_card.vehicle_rate(vehicle.id, band.id, weight_tier.id)
 
         if not rate:
             return Response({"success": False, "message": "No rate configured for this request"}, status=404)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InternationalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.international'
+
+
+    def ready(self):
+        import apps.international.signals
@@ -1,8 +1,7 @@
-import random
-import string
 import uuid
 from django.db import models
 from apps.accounts.models import User
+from core.utils.public_ids import save_with_public_id
 # Create your models here.
 
 class Country(models.Model):
@@ -44,11 +43,6 @@ class InternationalPolicy(models.Model):
     
 
 
-def generateID(pref):
-    random_id = "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
-    return f"{pref}{random_id}"
-
-
 class InternationalOrders(models.Model):
 
     id = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4, unique=True)
@@ -76,14 +70,7 @@ class InternationalOrders(models.Model):
 
 
     def save(self, *args, **kwargs):
-        if not self.order_id:
-            while True:
-                new_id = generateID("INT")
-                if not InternationalOrders.objects.filter(order_id=new_id).exists():
-                    self.order_id = new_id
-                    break
-
-        return super().save(*args, **kwargs)
+        return save_with_public_id(self, "order_id", "INT", super().save, *args, **kwargs)
 
 
     def __str__(self):
@@ -0,0 +1,10 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from apps.international.models import InternationalPolicy
+from core.utils.ratecards import rate_cards
+
+
+@receiver([post_save, post_delete], sender=InternationalPolicy)
+def rebuild_rate_cards(sender, instance, **kwargs):
+    transaction.on_commit(rate_cards.invalidate)
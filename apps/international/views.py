@@ -9,6 +9,7 @@ from apps.accounts.models import *
 from apps.international.models import *
 from apps.international.serializers import *
 from core.utils.payments import NobukPayments
+from core.utils.ratecards import rate_cards
 # Create your views here.
 
 
@@ -32,11 +33,7 @@ class InternationalPricingView(APIView):
             data = request.data
             city = data.get("city")
             weight = Decimal(data.get("weight", 0))
-            policy = InternationalPolicy.objects.filter(
-                city_id=int(city),
-                min_weight__lte=weight,
-                max_weight__gte=weight
-            ).first()
+            policy = rate_cards.get().international_policy(int(city), weight)
 
             if not policy:
                 return Response({ "success": False, "message": "There is no weight policy for that city."  })
@@ -4,3 +4,6 @@ from apps.messaging.models import *
 
 
 admin.site.register(Notification)
+admin.site.register(SmsMessage)
+admin.site.register(OutgoingEmail)
+admin.site.register(OutboxEvent)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class BatchQueue:
+    """
+    Claiming, retry back-off and drain scheduling for an outbox table with
+    status, attempts, next_attempt_at and error columns. Settings are read
+    as <prefix>_BATCH_SIZE, <prefix>_BATCH_WINDOW_SECONDS and so on.
+    """
+
+    def __init__(self, model, prefix, task):
+        self.model = model
+        self.prefix = prefix
+        self.task = task
+        self.drain_scheduled_key = f"{prefix.lower()}_outbox:drain_scheduled"
+        self.retry_scheduled_key = f"{prefix.lower()}_outbox:retry_at"
+
+
+    def setting(self, name):
+        return getattr(settings, f"{self.prefix}_{name}")
+
+
+    def get_task(self):
+        # imported late: the tasks module imports the senders
+        return import_string(self.task)
+
+
+    def schedule_drain(self):
+        # one pending drain at a time, so items queued together leave in one batch
+        delay = self.setting("BATCH_WINDOW_SECONDS")
+        if cache.add(self.drain_scheduled_key, 1, delay + 1):
+            self.get_task().apply_async(countdown=delay)
+
+
+    def schedule_retry(self, eta):
+        """
+        Wakes the outbox up at eta unless a wake-up is already pending for
+        then or sooner, so each drain doesn't start another chain of retries.
+        """
+        now = timezone.now()
+        eta = max(eta, now + timedelta(seconds=self.setting("BATCH_WINDOW_SECONDS")))
+        scheduled = cache.get(self.retry_scheduled_key)
+        # a marker at or before now belongs to a wake-up that has already run
+        if scheduled and now.timestamp() < scheduled <= eta.timestamp():
+            return
+        cache.set(self.retry_scheduled_key, eta.timestamp(), (eta - now).total_seconds() + 60)
+        self.get_task().apply_async(eta=eta)
+
+
+    def claim_batch(self):
+        """Up to <prefix>_BATCH_SIZE due items, marked as sending so other workers skip them."""
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                self.model.objects.select_for_update(skip_locked=True)
+                .filter(status__in=["queued", "sending"], next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "id")[:self.setting("BATCH_SIZE")]
+            )
+            if batch:
+                # a worker that dies mid-send leaves rows in "sending"; they come due again after the timeout
+                self.model.objects.filter(id__in=[item.id for item in batch]).update(
+                    status="sending",
+                    attempts=F("attempts") + 1,
+                    next_attempt_at=now + timedelta(seconds=self.setting("SENDING_TIMEOUT_SECONDS")),
+                )
+                for item in batch:
+                    item.attempts += 1
+        return batch
+
+
+    def retry_later(self, item, error, now):
+        """Queues a failed item again with exponential back-off, or fails it once out of attempts."""
+        item.error = str(error)
+        if item.attempts >= self.setting("MAX_ATTEMPTS"):
+            item.status = "failed"
+        else:
+            item.status = "queued"
+            item.next_attempt_at = now + timedelta(seconds=self.setting("RETRY_BACKOFF_SECONDS") * 2 ** (item.attempts - 1))
+
+
+    def drain(self, send_batch):
+        """Claims and sends due items batch by batch; returns how many were attempted."""
+        cache.delete(self.drain_scheduled_key)
+        attempted = 0
+
+        while True:
+            batch = self.claim_batch()
+            if not batch:
+                break
+            send_batch(batch)
+            attempted += len(batch)
+
+        # wake up again for the earliest retry
+        next_retry = self.model.objects.filter(status="queued").aggregate(Min("next_attempt_at"))["next_attempt_at__min"]
+        if next_retry:
+            self.schedule_retry(next_retry)
+
+        return attempted
@@ -0,0 +1,74 @@
+import logging
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from apps.messaging.batches import BatchQueue
+from apps.messaging.models import OutgoingEmail
+
+
+logger = logging.getLogger(__name__)
+
+queue = BatchQueue(OutgoingEmail, "EMAIL", "apps.messaging.tasks.send_email_outbox")
+
+
+def queue_email(subject, to, html_message=None, message=None, from_email=None):
+    """Adds an email to the outbox; it goes out with the next batch after the transaction commits."""
+    to = [address for address in to if address]
+    if not to:
+        return None
+
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=message if message is not None else strip_tags(html_message or ""),
+        html_body=html_message,
+        from_email=from_email or None,
+        to=to,
+    )
+    transaction.on_commit(queue.schedule_drain)
+    return email
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to, connection=connection)
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def send_batch(batch):
+    """Sends a batch over a single SMTP connection; each email succeeds or fails on its own."""
+    now = timezone.now()
+    connection = get_connection(fail_silently=False)
+
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning(f"Email batch of {len(batch)} failed to connect: {e}")
+        errors = {email.id: e for email in batch}
+    else:
+        errors = {}
+        try:
+            for email in batch:
+                try:
+                    connection.send_messages([build_message(email, connection)])
+                except Exception as e:
+                    errors[email.id] = e
+        finally:
+            connection.close()
+
+    for email in batch:
+        error = errors.get(email.id)
+        if error is None:
+            email.status, email.error, email.sent_at = "sent", None, now
+            continue
+
+        queue.retry_later(email, error, now)
+
+    OutgoingEmail.objects.bulk_update(batch, ["status", "next_attempt_at", "error", "sent_at"])
+
+
+def drain_outbox():
+    """Sends due emails batch by batch; returns how many were attempted."""
+    return queue.drain(send_batch)
@@ -0,0 +1,54 @@
+import time
+import logging
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.messaging.outbox import relay_batch, prune
+
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL_SECONDS = 3600
+
+# longest wait between attempts while the database or broker is down
+MAX_BACKOFF_SECONDS = 30
+
+
+class Command(BaseCommand):
+    help = "Publish committed outbox events to Celery in batches. Run one or more alongside the workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="publish everything pending, then exit")
+
+    def handle(self, *args, **options):
+        last_prune = 0
+        failures = 0
+
+        while True:
+            try:
+                if time.monotonic() - last_prune > PRUNE_INTERVAL_SECONDS:
+                    prune()
+                    last_prune = time.monotonic()
+
+                published = relay_batch()
+            except Exception:
+                if options["once"]:
+                    raise
+                failures += 1
+                delay = min(settings.OUTBOX_POLL_SECONDS * 2 ** failures, MAX_BACKOFF_SECONDS)
+                logger.exception(f"Outbox relay failed, retrying in {delay:.1f}s")
+                # a dropped connection is replaced on the next query
+                close_old_connections()
+                time.sleep(delay)
+                continue
+
+            failures = 0
+            if published:
+                self.stdout.write(f"Published {published} events")
+                continue
+
+            if options["once"]:
+                return
+
+            time.sleep(settings.OUTBOX_POLL_SECONDS)
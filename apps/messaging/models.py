@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.accounts.models import *
 from apps.deliveries.models import *
 # Create your models here.
@@ -20,3 +21,82 @@ class Notification(models.Model):
 
 
 
+class SmsMessage(models.Model):
+    """Outbox row; the send_sms_outbox task delivers queued rows in batches."""
+
+    STATUS_CHOICES = [
+        ("queued", "queued"),
+        ("sending", "sending"),
+        ("sent", "sent"),
+        ("failed", "failed"),
+    ]
+
+    phone = models.CharField(max_length=20)
+    text = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    provider_message_id = models.CharField(max_length=100, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"SMS to {self.phone} ({self.status})"
+
+
+
+class OutgoingEmail(models.Model):
+    """Outbox row; the send_email_outbox task delivers queued rows over one SMTP connection per batch."""
+
+    STATUS_CHOICES = SmsMessage.STATUS_CHOICES
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(null=True, blank=True)
+    from_email = models.CharField(max_length=255, null=True, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)} ({self.status})"
+
+
+
+class OutboxEvent(models.Model):
+    """
+    A Celery task recorded in the same transaction as the change that
+    caused it; the relay_outbox command publishes it once that commits.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    eta = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    consumed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["published_at", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.key})"
@@ -0,0 +1,84 @@
+import uuid
+import logging
+from datetime import timedelta
+from functools import wraps
+from celery import current_app, current_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.messaging.models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+def publish(task, args=(), kwargs=None, eta=None, key=None):
+    """
+    Records a task to run once the current transaction commits. key makes
+    the event idempotent: publishing the same key twice is a no-op, and the
+    task runs under that id so an idempotent consumer runs it only once.
+    """
+    event = OutboxEvent(key=key or uuid.uuid4().hex, task=task, args=list(args), kwargs=kwargs or {}, eta=eta)
+    OutboxEvent.objects.bulk_create([event], ignore_conflicts=True)
+    return event
+
+
+def relay_batch():
+    """
+    Publishes up to OUTBOX_BATCH_SIZE unpublished events over one broker
+    connection; returns how many. The rows stay locked while publishing, so
+    the batch size bounds how long the transaction is held open.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True)
+            .order_by("id")[:settings.OUTBOX_BATCH_SIZE]
+        )
+        if not events:
+            return 0
+
+        # a crash before the update below republishes the batch; consumers drop the repeats
+        with current_app.producer_or_acquire() as producer:
+            for event in events:
+                current_app.send_task(
+                    event.task,
+                    args=event.args,
+                    kwargs=event.kwargs,
+                    eta=event.eta,
+                    task_id=event.key,
+                    producer=producer,
+                )
+
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(published_at=timezone.now())
+    return len(events)
+
+
+def prune():
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(published_at__lt=cutoff).delete()
+    return deleted
+
+
+def idempotent(func):
+    """
+    For tasks fed by the outbox: a task id that belongs to an already
+    consumed event is skipped. Calls from anywhere else run as before.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = current_task.request.id if current_task else None
+        if key:
+            claimed = OutboxEvent.objects.filter(key=key, consumed_at__isnull=True).update(consumed_at=timezone.now())
+            if not claimed and OutboxEvent.objects.filter(key=key).exists():
+                logger.info(f"Skipping duplicate delivery of outbox event {key}")
+                return None
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            # failed or retried, so the next delivery has to run it again
+            if key:
+                OutboxEvent.objects.filter(key=key).update(consumed_at=None)
+            raise
+    return wrapper
@@ -0,0 +1,118 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from firebase_admin import messaging
+
+from apps.drivers.models import DriverDevice
+from apps.messaging.firebase import init_firebase
+
+
+logger = logging.getLogger(__name__)
+
+# FCM accepts at most 500 tokens per multicast
+FCM_MAX_TOKENS = 500
+
+# tokens FCM will never deliver to again
+DEAD_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.PUSH_WORKERS, thread_name_prefix="fcm")
+    return _executor
+
+
+def token_key(user_id):
+    return f"fcm_token:{user_id}"
+
+
+def get_driver_tokens(driver_ids):
+    """FCM token per driver from the cache, falling back to one query for the misses."""
+    keys = {driver_id: token_key(driver_id) for driver_id in map(str, driver_ids)}
+    cached = cache.get_many(keys.values())
+    tokens = {driver_id: cached[key] for driver_id, key in keys.items() if key in cached}
+
+    missing = [driver_id for driver_id in keys if driver_id not in tokens]
+    if missing:
+        found = {
+            str(user_id): token
+            for user_id, token in DriverDevice.objects.filter(user_id__in=missing).values_list("user_id", "fcm_token")
+        }
+        # "" marks a driver without a device, so they aren't looked up again every round
+        fetched = {driver_id: found.get(driver_id) or "" for driver_id in missing}
+        cache.set_many({keys[driver_id]: token for driver_id, token in fetched.items()}, settings.PUSH_TOKEN_CACHE_SECONDS)
+        tokens.update(fetched)
+
+    return [token for token in tokens.values() if token]
+
+
+def send_chunk(tokens, title, body, data):
+    message = messaging.MulticastMessage(
+        notification=messaging.Notification(title=title, body=body),
+        tokens=tokens,
+        data=data,
+    )
+
+    started = time.perf_counter()
+    response = messaging.send_each_for_multicast(message)
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    dead = [
+        token for token, result in zip(tokens, response.responses)
+        if not result.success and isinstance(result.exception, DEAD_TOKEN_ERRORS)
+    ]
+    for token, result in zip(tokens, response.responses):
+        if not result.success and token not in dead:
+            logger.warning(f"FCM error for token {token[:20]}: {result.exception}")
+
+    logger.info(
+        f"FCM batch: {len(tokens)} tokens, {response.success_count} sent, "
+        f"{response.failure_count} failed ({len(dead)} dead) in {latency_ms:.0f} ms"
+    )
+    return {"sent": response.success_count, "failed": response.failure_count, "dead": dead, "latency_ms": latency_ms}
+
+
+def send_push(tokens, title, body, data=None):
+    """
+    Sends to every token in chunks of FCM_MAX_TOKENS, concurrently, and
+    deletes the devices of tokens FCM reports as unregistered. Returns
+    totals and per-batch latencies.
+    """
+    tokens = list(dict.fromkeys(tokens))
+    data = {str(k): str(v) for k, v in (data or {}).items()}
+    stats = {"tokens": len(tokens), "sent": 0, "failed": 0, "pruned": 0, "batch_latency_ms": []}
+    if not tokens:
+        return stats
+
+    init_firebase()
+    chunks = [tokens[i:i + FCM_MAX_TOKENS] for i in range(0, len(tokens), FCM_MAX_TOKENS)]
+    futures = [get_executor().submit(send_chunk, chunk, title, body, data) for chunk in chunks]
+
+    dead = []
+    for future in futures:
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"FCM batch failed: {e}")
+            continue
+        stats["sent"] += result["sent"]
+        stats["failed"] += result["failed"]
+        stats["batch_latency_ms"].append(round(result["latency_ms"]))
+        dead.extend(result["dead"])
+
+    if dead:
+        # deleting fires post_delete, which drops the cached token
+        stats["pruned"], _ = DriverDevice.objects.filter(fcm_token__in=dead).delete()
+
+    return stats
+
+
+def notify_drivers(drivers, title, body, data=None):
+    """Push to drivers given as users or ids."""
+    driver_ids = [getattr(driver, "id", driver) for driver in drivers]
+    return send_push(get_driver_tokens(driver_ids), title, body, data)
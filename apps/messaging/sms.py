@@ -0,0 +1,105 @@
+import os
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.messaging.batches import BatchQueue
+from apps.messaging.models import SmsMessage
+
+
+logger = logging.getLogger(__name__)
+
+queue = BatchQueue(SmsMessage, "SMS", "apps.messaging.tasks.send_sms_outbox")
+
+
+class OnfonClient:
+    """Onfon bulk SMS over one keep-alive session per process."""
+
+    def __init__(self):
+        self._session = None
+        self._pid = None
+
+
+    @property
+    def session(self):
+        # sessions hold sockets, so a forked worker opens its own
+        if self._session is None or self._pid != os.getpid():
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=settings.SMS_POOL_SIZE))
+            session.mount("http://", HTTPAdapter(pool_maxsize=settings.SMS_POOL_SIZE))
+            session.headers.update({"AccessKey": settings.ONFON_CLIENTID, "Content-Type": "application/json"})
+            self._session, self._pid = session, os.getpid()
+        return self._session
+
+
+    def send(self, messages):
+        """
+        Sends (phone, text) pairs in one request. Returns one
+        (message_id, error) pair per message, in the same order; raises on
+        transport or account-level errors, which are worth retrying.
+        """
+        payload = {
+            "SenderId": settings.ONFON_SENDERID,
+            "MessageParameters": [{"Number": phone, "Text": text} for phone, text in messages],
+            "ApiKey": settings.ONFON_APIKEY,
+            "ClientId": settings.ONFON_CLIENTID,
+        }
+
+        response = self.session.post(
+            settings.ONFON_SMS_URL,
+            json=payload,
+            timeout=(settings.SMS_CONNECT_TIMEOUT_SECONDS, settings.SMS_READ_TIMEOUT_SECONDS),
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("ErrorCode", 0) != 0:
+            raise requests.RequestException(data.get("ErrorDescription") or f"Onfon error {data.get('ErrorCode')}")
+
+        results = data.get("Data") or []
+        return [
+            (result.get("MessageId"), None) if result.get("MessageErrorCode", 0) == 0
+            else (None, result.get("MessageErrorDescription") or f"Onfon error {result.get('MessageErrorCode')}")
+            for result in results
+        ] + [(None, None)] * (len(messages) - len(results))
+
+
+
+onfon = OnfonClient()
+
+
+def queue_sms(phone, text):
+    """Adds a message to the outbox; it is sent in the next batch after the transaction commits."""
+    if not phone or not text:
+        return None
+
+    sms = SmsMessage.objects.create(phone=phone, text=text)
+    transaction.on_commit(queue.schedule_drain)
+    return sms
+
+
+def send_batch(batch):
+    now = timezone.now()
+    try:
+        results = onfon.send([(sms.phone, sms.text) for sms in batch])
+    except (requests.RequestException, ValueError) as e:
+        logger.warning(f"SMS batch of {len(batch)} failed: {e}")
+        for sms in batch:
+            queue.retry_later(sms, e, now)
+    else:
+        for sms, (message_id, error) in zip(batch, results):
+            # a rejected number will not succeed on retry
+            sms.status = "failed" if error else "sent"
+            sms.provider_message_id = message_id
+            sms.error = error
+            sms.sent_at = None if error else now
+
+    SmsMessage.objects.bulk_update(batch, ["status", "next_attempt_at", "provider_message_id", "error", "sent_at"])
+
+
+def drain_outbox():
+    """Sends due messages batch by batch; returns how many were attempted."""
+    return queue.drain(send_batch)
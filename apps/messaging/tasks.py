@@ -0,0 +1,25 @@
+from celery import shared_task
+from apps.messaging.models import Notification
+from apps.messaging.outbox import idempotent
+
+
+@shared_task(name="apps.messaging.tasks.fan_out_notifications")
+@idempotent
+def fan_out_notifications(notifications):
+    """Every notification for one event, written with a single insert."""
+    Notification.objects.bulk_create([Notification(**notification) for notification in notifications])
+    return len(notifications)
+
+
+
+@shared_task(name="apps.messaging.tasks.send_sms_outbox")
+def send_sms_outbox():
+    from apps.messaging.sms import drain_outbox
+    return drain_outbox()
+
+
+
+@shared_task(name="apps.messaging.tasks.send_email_outbox")
+def send_email_outbox():
+    from apps.messaging.mailer import drain_outbox
+    return drain_outbox()
@@ -1,6 +1,9 @@
 import requests
 from apps.messaging.models import Notification
+from apps.messaging.outbox import publish
+from apps.messaging.sms import queue_sms
 from django.conf import settings
+from django.db import transaction
 
 from rest_framework import status
 from rest_framework.response import Response
@@ -15,29 +18,27 @@ def send_notification(user, title, message):
 
 
 
-
-def send_message(phone, message):
-    url = settings.ONFON_SMS_URL
-    payload = {
-        "SenderId": settings.ONFON_SENDERID,
-        "MessageParameters": [
-            {"Number": phone, "Text": message},
-        ],
-        "ApiKey": settings.ONFON_APIKEY,
-        "ClientId": settings.ONFON_CLIENTID
+def notification(user, title, message, package=None, shipment=None, notification_type="general"):
+    """One row for fan_out, kept JSON-safe for Celery. user may be a User or an id."""
+    return {
+        "user_id": str(getattr(user, "id", user)),
+        "title": title,
+        "message": message,
+        "package_id": str(getattr(package, "id", package)) if package else None,
+        "shipment_id": str(getattr(shipment, "id", shipment)) if shipment else None,
+        "notification_type": notification_type,
     }
 
-    headers = {
-        "AccessKey": settings.ONFON_CLIENTID,
-        "Content-Type": "application/json",
-    }
 
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-        response_data = response.json()
-        # return Response(response_data, status=response.status_code)
-    except Exception as e:
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+def fan_out(notifications):
+    """Records an event's notifications in the outbox; they are written with one bulk insert after commit."""
+    notifications = list(notifications)
+    if notifications:
+        publish("apps.messaging.tasks.fan_out_notifications", args=[notifications])
 
 
 
+
+def send_message(phone, message):
+    """Queues an SMS in the outbox; send_sms_outbox delivers it in the next batch."""
+    return queue_sms(phone, message)
@@ -16,6 +16,7 @@ from apps.messaging.serializers import *
 from apps.drivers.models import *
 from apps.messaging.firebase import *
 from apps.messaging.utils import send_message
+from apps.messaging.push import notify_drivers
 # Create your views here.
 
 
@@ -33,38 +34,10 @@ class NotificationsView(generics.ListAPIView):
 
 
 def intracity_drivers_notification(drivers, title, body, data=None):
-    init_firebase()
-    tokens = list(
-        DriverDevice.objects.filter(user__in=drivers)
-        .exclude(fcm_token__isnull=True)
-        .exclude(fcm_token__exact="")
-        .values_list("fcm_token", flat=True)
-    )
-
-    if not tokens:
+    stats = notify_drivers(drivers, title, body, data)
+    if not stats["tokens"]:
         print("No tokens found.")
-        return
-
-
-    message = messaging.MulticastMessage(
-        notification=messaging.Notification(
-            title=title,
-            body=body,
-        ),
-        tokens=tokens,
-        data={str(k): str(v) for k, v in (data or {}).items()},
-    )
-
-    
-    response = messaging.send_each_for_multicast(message)
-
-    
-    for idx, resp in enumerate(response.responses):
-        if not resp.success:
-            print(f"❌ Error for token {tokens[idx]}: {resp.exception}")
-
-
-
+    return stats
 
 
 
@@ -2,6 +2,7 @@ import uuid
 from django.db import models
 from apps.accounts.models import *
 from apps.deliveries.models import *
+from core.utils.public_ids import save_with_public_id
 from django.contrib.auth import get_user_model
 
 user = get_user_model()
@@ -27,13 +28,7 @@ class Invoice(models.Model):
     parent_invoice = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='child_invoices')
 
     def save(self, *args, **kwargs):
-        if not self.invoice_id:
-            while True:
-                new_id = generateID("IN")
-                if not Invoice.objects.filter(invoice_id=new_id).exists():
-                    self.invoice_id = new_id
-                    break
-        super().save(*args, **kwargs)
+        save_with_public_id(self, "invoice_id", "IN", super().save, *args, **kwargs)
 
     def __str__(self):
         return f"{self.invoice_id}"
@@ -57,13 +52,7 @@ class ConsolidatedInvoice(models.Model):
 
 
     def save(self, *args, **kwargs):
-        if not self.consolidated_invoice_id:
-            while True:
-                new_id = generateID("CIN")
-                if not ConsolidatedInvoice.objects.filter(consolidated_invoice_id=new_id).exists():
-                    self.consolidated_invoice_id = new_id
-                    break
-        super().save(*args, **kwargs)
+        save_with_public_id(self, "consolidated_invoice_id", "CIN", super().save, *args, **kwargs)
 
 
     def __str__(self):
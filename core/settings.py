@@ -209,6 +209,27 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.User'
 GOOGLE_MAPS_API_KEY=os.getenv("GOOGLE_MAPS_API_KEY")
+GOOGLE_MAPS_TIMEOUT_SECONDS = int(os.getenv("GOOGLE_MAPS_TIMEOUT_SECONDS", 5))
+
+# road distance cache: coordinates are snapped to this grid (0.001 deg is about 110 m)
+ROAD_DISTANCE_GRID_DEGREES = float(os.getenv("ROAD_DISTANCE_GRID_DEGREES", 0.001))
+ROAD_DISTANCE_CACHE_TTL = int(os.getenv("ROAD_DISTANCE_CACHE_TTL", 60 * 60 * 24 * 30))
+ROAD_DISTANCE_LOCAL_TTL = int(os.getenv("ROAD_DISTANCE_LOCAL_TTL", 60 * 60 * 24))
+ROAD_DISTANCE_LOCAL_SIZE = int(os.getenv("ROAD_DISTANCE_LOCAL_SIZE", 10000))
+# concurrent lookups within one quote; each call is also bound by GOOGLE_MAPS_TIMEOUT_SECONDS
+ROAD_DISTANCE_WORKERS = int(os.getenv("ROAD_DISTANCE_WORKERS", 16))
+ROAD_DISTANCE_DEADLINE_SECONDS = float(os.getenv("ROAD_DISTANCE_DEADLINE_SECONDS", 8))
+
+# intra-city coverage map: geohash precision 6 cells are about 1.2 x 0.6 km.
+# a road factor > 0 lets cells within radius / factor in a straight line skip the
+# road check, accepting some points whose road distance is over the radius
+INTRACITY_COVERAGE_PRECISION = int(os.getenv("INTRACITY_COVERAGE_PRECISION", 6))
+INTRACITY_ROAD_FACTOR = float(os.getenv("INTRACITY_ROAD_FACTOR", 0))
+
+BULK_QUOTE_MAX_SHIPMENTS = int(os.getenv("BULK_QUOTE_MAX_SHIPMENTS", 500))
+PACKAGE_IMPORT_MAX_ROWS = int(os.getenv("PACKAGE_IMPORT_MAX_ROWS", 20000))
+PACKAGE_IMPORT_BATCH_SIZE = int(os.getenv("PACKAGE_IMPORT_BATCH_SIZE", 1000))
+QUOTE_TOKEN_MAX_AGE_SECONDS = int(os.getenv("QUOTE_TOKEN_MAX_AGE_SECONDS", 60 * 15))
 
 
 #EMAIL Settings
@@ -220,6 +241,14 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
+# Email outbox: emails queued within the window share one SMTP connection
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 50))
+EMAIL_BATCH_WINDOW_SECONDS = float(os.getenv("EMAIL_BATCH_WINDOW_SECONDS", 2))
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 20))
+EMAIL_SENDING_TIMEOUT_SECONDS = int(os.getenv("EMAIL_SENDING_TIMEOUT_SECONDS", 600))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_RETRY_BACKOFF_SECONDS = int(os.getenv("EMAIL_RETRY_BACKOFF_SECONDS", 60))
+
 
 # CELERY SETTINGS
 CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
@@ -229,6 +258,42 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Africa/Nairobi"
 
+# Transactional outbox, published by the relay_outbox command
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 0.5))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+
+
+# running numbers reserved per round trip to the database sequence
+NUMBER_BLOCK_SIZE = int(os.getenv("NUMBER_BLOCK_SIZE", 1))
+
+
+# CACHE SETTINGS
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"{REDIS_URL}/1",
+    }
+}
+
+# live rider positions (Redis GEO set); positions older than the max age are ignored
+DRIVER_POSITIONS_REDIS_URL = os.getenv("DRIVER_POSITIONS_REDIS_URL", f"{REDIS_URL}/2")
+DRIVER_POSITION_MAX_AGE_SECONDS = int(os.getenv("DRIVER_POSITION_MAX_AGE_SECONDS", 600))
+
+# the position store buffers pings; moves shorter than this are jitter, and riders that moved are flushed to DriverLocation this often
+DRIVER_LOCATION_MIN_MOVE_METERS = float(os.getenv("DRIVER_LOCATION_MIN_MOVE_METERS", 15))
+DRIVER_LOCATION_FLUSH_SECONDS = int(os.getenv("DRIVER_LOCATION_FLUSH_SECONDS", 30))
+
+# stage tracks that ended longer ago than this are deleted by the prune_tracks command
+TRACK_RETENTION_DAYS = int(os.getenv("TRACK_RETENTION_DAYS", 180))
+
+# riders already notified about an order are skipped in its later dispatch rounds for this long
+DISPATCH_CONTACTED_TTL_SECONDS = int(os.getenv("DISPATCH_CONTACTED_TTL_SECONDS", 24 * 60 * 60))
+
+# how often in-process lookup indexes (offices, rate cards...) check for a newer version
+INDEX_VERSION_CHECK_SECONDS = int(os.getenv("INDEX_VERSION_CHECK_SECONDS", 1))
+
 
 
 # NOBUK SETTINGS
@@ -246,5 +311,19 @@ ONFON_SENDERID=os.getenv("ONFON_SENDERID")
 ONFON_APIKEY=os.getenv("ONFON_APIKEY")
 ONFON_CLIENTID=os.getenv("ONFON_CLIENTID")
 
+# SMS outbox: messages queued within the window leave together, up to the batch size per request
+SMS_BATCH_SIZE = int(os.getenv("SMS_BATCH_SIZE", 100))
+SMS_BATCH_WINDOW_SECONDS = float(os.getenv("SMS_BATCH_WINDOW_SECONDS", 2))
+SMS_POOL_SIZE = int(os.getenv("SMS_POOL_SIZE", 4))
+SMS_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SMS_CONNECT_TIMEOUT_SECONDS", 5))
+SMS_READ_TIMEOUT_SECONDS = float(os.getenv("SMS_READ_TIMEOUT_SECONDS", 20))
+SMS_SENDING_TIMEOUT_SECONDS = int(os.getenv("SMS_SENDING_TIMEOUT_SECONDS", 300))
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", 5))
+SMS_RETRY_BACKOFF_SECONDS = int(os.getenv("SMS_RETRY_BACKOFF_SECONDS", 30))
+
+# FCM push: concurrent multicast batches, and how long a driver's token stays cached
+PUSH_WORKERS = int(os.getenv("PUSH_WORKERS", 8))
+PUSH_TOKEN_CACHE_SECONDS = int(os.getenv("PUSH_TOKEN_CACHE_SECONDS", 60 * 60))
+
 
 
@@ -1,16 +1,14 @@
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+
+from apps.messaging.mailer import queue_email
 
 
 def send_welcome_email(user):
     subject = "Welcome to Expa Logistics 🚚"
     html_message = render_to_string("accounts/welcome_email.html", {"user": user})
-    plain_message = strip_tags(html_message)
-    from_email = None
     to = [user.email]
 
-    send_mail(subject, plain_message, from_email, to, html_message=html_message)
+    queue_email(subject, to, html_message=html_message)
 
 
 
@@ -18,12 +16,9 @@ def send_welcome_email(user):
 def send_order_creation_email(user, order):
     subject = f"Order #{order.package_id} Created Successfully"
     html_message = render_to_string("deliveries/package_creation_email.html", {"user": user, "order": order})
-    plain_message = strip_tags(html_message)
-    from_email = None
     to = [user.email]
 
-
-    send_mail(subject, plain_message, from_email, to, html_message=html_message)
+    queue_email(subject, to, html_message=html_message)
 
 
 
@@ -31,13 +26,30 @@ def send_order_creation_email(user, order):
 def send_order_creation_email_admin(user, order):
     subject = f"Order #{order.package_id} - from {order.sender_name}"
     html_message = render_to_string("deliveries/admin_package_creation_email.html", {"user": user, "order": order})
-    plain_message = strip_tags(html_message)
-    from_email = None
     to = ['app.orders@expa.co.ke']
 
+    queue_email(subject, to, html_message=html_message)
+
 
-    send_mail(subject, plain_message, from_email, to, html_message=html_message)
 
 
+# an import email lists this many packages, the rest are only counted
+IMPORT_EMAIL_ROWS = 50
+
+
+def send_import_email(user, packages):
+    subject = f"{len(packages)} Orders Imported Successfully"
+    html_message = render_to_string("deliveries/package_import_email.html", {"user": user, "packages": packages[:IMPORT_EMAIL_ROWS], "count": len(packages)})
+    to = [user.email]
 
+    queue_email(subject, to, html_message=html_message)
+
+
+
+
+def send_import_email_admin(user, packages):
+    subject = f"{len(packages)} Orders Imported - from {user.full_name}"
+    html_message = render_to_string("deliveries/admin_package_import_email.html", {"user": user, "packages": packages[:IMPORT_EMAIL_ROWS], "count": len(packages)})
+    to = ['app.orders@expa.co.ke']
 
+    queue_email(subject, to, html_message=html_message)
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# WGS-84, used by accurate mode
+WGS84_A_KM = 6378.137
+WGS84_F = 1 / 298.257223563
+
+
+def as_coords(points):
+    """Turn a (lat, lng) pair or a sequence of pairs into an (n, 2) float array."""
+    coords = np.asarray(points, dtype=float)
+    return coords.reshape(-1, 2)
+
+
+def _central_angle(lat1, lng1, lat2, lng2):
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+def _haversine(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    return EARTH_RADIUS_KM * _central_angle(lat1, lng1, lat2, lng2)
+
+
+def _lambert(lat1, lng1, lat2, lng2):
+    """
+    Lambert's ellipsoidal correction of the great-circle distance. Stays
+    within 0.001% of geopy's geodesic (a few metres across Kenya) for any pair of
+    points that are not close to antipodal. Plain haversine is within 0.6%.
+    """
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+
+    beta1 = np.arctan((1 - WGS84_F) * np.tan(lat1))
+    beta2 = np.arctan((1 - WGS84_F) * np.tan(lat2))
+    sigma = _central_angle(beta1, lng1, beta2, lng2)
+
+    p = (beta1 + beta2) / 2
+    q = (beta2 - beta1) / 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (sigma - np.sin(sigma)) * np.sin(p) ** 2 * np.cos(q) ** 2 / np.cos(sigma / 2) ** 2
+        y = (sigma + np.sin(sigma)) * np.cos(p) ** 2 * np.sin(q) ** 2 / np.sin(sigma / 2) ** 2
+        distance = WGS84_A_KM * (sigma - WGS84_F / 2 * (x + y))
+
+    return np.where(sigma == 0, 0.0, distance)
+
+
+def _distance(lat1, lng1, lat2, lng2, accurate):
+    if accurate:
+        return _lambert(lat1, lng1, lat2, lng2)
+    return _haversine(lat1, lng1, lat2, lng2)
+
+
+def distance_km(a, b, accurate=False):
+    """Distance in km between two (lat, lng) points."""
+    (lat1, lng1), (lat2, lng2) = as_coords(a)[0], as_coords(b)[0]
+    return float(_distance(lat1, lng1, lat2, lng2, accurate))
+
+
+def distances_km(origin, points, accurate=False):
+    """Distances in km from one (lat, lng) point to each of points, as an array."""
+    lat, lng = as_coords(origin)[0]
+    coords = as_coords(points)
+    return _distance(lat, lng, coords[:, 0], coords[:, 1], accurate)
+
+
+def distance_matrix_km(origins, destinations, accurate=False):
+    """(len(origins), len(destinations)) array of distances in km."""
+    origins = as_coords(origins)
+    destinations = as_coords(destinations)
+    return _distance(
+        origins[:, 0, None], origins[:, 1, None],
+        destinations[None, :, 0], destinations[None, :, 1],
+        accurate,
+    )
@@ -0,0 +1,35 @@
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def cell_size(precision):
+    """(lat, lng) size in degrees of a geohash cell at this precision."""
+    bits = precision * 5
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+
+
+def encode(lat, lng, precision):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    value, bit, even = 0, 0, True
+
+    while len(chars) < precision:
+        # even bits split longitude, odd bits split latitude
+        span, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (span[0] + span[1]) / 2
+
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            span[0] = mid
+        else:
+            span[1] = mid
+
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(BASE32[value])
+            value, bit = 0, 0
+
+    return "".join(chars)
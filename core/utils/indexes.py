@@ -0,0 +1,51 @@
+import time
+import threading
+from django.conf import settings
+from django.core.cache import cache
+
+
+class VersionedIndex:
+    """
+    Per-process snapshot of database rows, rebuilt when the shared version
+    stamp in the cache is bumped by another process.
+    """
+
+    def __init__(self, name, builder):
+        self.name = name
+        self.builder = builder
+        self.version_key = f"index_version:{name}"
+
+        self._data = None
+        self._version = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+
+    def get(self):
+        now = time.monotonic()
+        check_interval = getattr(settings, "INDEX_VERSION_CHECK_SECONDS", 1)
+
+        if self._data is not None and now - self._checked_at < check_interval:
+            return self._data
+
+        version = cache.get(self.version_key, 0)
+        self._checked_at = now
+
+        if self._data is None or version != self._version:
+            with self._lock:
+                if self._data is None or version != self._version:
+                    self._data = self.builder()
+                    self._version = version
+
+        return self._data
+
+
+    def invalidate(self):
+        # bump the shared stamp so every worker reloads, then drop our own copy
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, 1, None)
+
+        with self._lock:
+            self._data = None
@@ -0,0 +1,68 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over (keyword, rank) pairs. first_match scans the
+    text once and returns the lowest rank of any keyword found in it,
+    however many keywords there are.
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.best = [None]
+
+        for keyword, rank in keywords:
+            if keyword:
+                self._add(keyword, rank)
+        self._link()
+
+
+    def _add(self, keyword, rank):
+        node = 0
+        for char in keyword:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.best.append(None)
+            node = nxt
+
+        if self.best[node] is None or rank < self.best[node]:
+            self.best[node] = rank
+
+
+    def _link(self):
+        # breadth first, so a node's fail target is finished before the node
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            fail_best = self.best[self.fail[node]]
+            if fail_best is not None and (self.best[node] is None or fail_best < self.best[node]):
+                self.best[node] = fail_best
+
+            for char, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                queue.append(child)
+
+
+    def first_match(self, text):
+        node, found = 0, None
+
+        for char in text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+
+            rank = self.best[node]
+            if rank is not None and (found is None or rank < found):
+                found = rank
+
+        return found
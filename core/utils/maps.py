@@ -0,0 +1,309 @@
+import logging
+import threading
+import googlemaps
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from decimal import Decimal
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Distance Matrix limits per request
+MAX_MATRIX_SIDE = 25
+MAX_MATRIX_ELEMENTS = 100
+
+_gmaps = None
+_executor = None
+
+
+def get_gmaps():
+    global _gmaps
+    if _gmaps is None:
+        _gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY, timeout=settings.GOOGLE_MAPS_TIMEOUT_SECONDS)
+    return _gmaps
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.ROAD_DISTANCE_WORKERS, thread_name_prefix="road-distance")
+    return _executor
+
+
+def parse_coords(coords):
+    if isinstance(coords, str):
+        coords = coords.split(",")
+    return float(coords[0]), float(coords[1])
+
+
+def snap_coords(coords):
+    grid = settings.ROAD_DISTANCE_GRID_DEGREES
+    lat, lng = parse_coords(coords)
+    return round(round(lat / grid) * grid, 6), round(round(lng / grid) * grid, 6)
+
+
+def try_snap_coords(coords):
+    """Snapped coordinates, or None when coords can't be parsed."""
+    try:
+        return snap_coords(coords)
+    except (TypeError, ValueError, IndexError, AttributeError):
+        logger.warning(f"Invalid coordinates for road distance: {coords!r}")
+        return None
+
+
+
+class RoadDistanceProvider:
+    """
+    Driving distances from the Google Distance Matrix API behind a per-process
+    LRU and the shared Django cache. Coordinates are snapped to a grid so
+    nearby points share one cache entry.
+    """
+
+    def __init__(self):
+        self.local = TTLCache(
+            maxsize=settings.ROAD_DISTANCE_LOCAL_SIZE,
+            ttl=settings.ROAD_DISTANCE_LOCAL_TTL,
+        )
+        self.lock = threading.Lock()
+        self.counters = {"local_hits": 0, "shared_hits": 0, "misses": 0, "errors": 0}
+
+
+    def cache_key(self, origin, destination):
+        return "road_km:{},{}:{},{}".format(*origin, *destination)
+
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+    # the shared cache only saves requests, so when it fails every lookup is a miss
+
+    def cache_get_many(self, keys):
+        try:
+            return cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Road distance cache read failed: {e}")
+            return {}
+
+
+    def cache_set_many(self, distances):
+        try:
+            cache.set_many(distances, settings.ROAD_DISTANCE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Road distance cache write failed: {e}")
+
+
+    def get_km(self, origin, destination):
+        origin, destination = try_snap_coords(origin), try_snap_coords(destination)
+        if origin is None or destination is None:
+            return None
+        key = self.cache_key(origin, destination)
+
+        with self.lock:
+            distance = self.local.get(key)
+        if distance is not None:
+            self.count("local_hits")
+            return distance
+
+        distance = self.cache_get_many([key]).get(key)
+        if distance is not None:
+            self.count("shared_hits")
+        else:
+            self.count("misses")
+            distance = self.fetch(origin, destination)
+            if distance is None:
+                return None
+            self.cache_set_many({key: distance})
+
+        with self.lock:
+            self.local[key] = distance
+        return distance
+
+
+    def get_matrix_km(self, origins, destinations):
+        """
+        Distances for every origin/destination pair as a list of rows. Cached
+        pairs are served from the caches; the rest are fetched together in as
+        few Distance Matrix requests as the API limits allow. Pairs that
+        can't be resolved are None.
+        """
+        origins = [try_snap_coords(origin) for origin in origins]
+        destinations = [try_snap_coords(destination) for destination in destinations]
+        # pairs with unparseable coordinates come back as None
+        keys = {
+            (origin, destination): self.cache_key(origin, destination)
+            for origin in origins if origin is not None
+            for destination in destinations if destination is not None
+        }
+
+        found = {}
+        with self.lock:
+            for pair, key in keys.items():
+                distance = self.local.get(key)
+                if distance is not None:
+                    found[pair] = distance
+        self.count("local_hits", len(found))
+
+        missing_keys = {key: pair for pair, key in keys.items() if pair not in found}
+        if missing_keys:
+            shared = self.cache_get_many(list(missing_keys))
+            self.count("shared_hits", len(shared))
+            for key, distance in shared.items():
+                found[missing_keys[key]] = distance
+
+        missing = [pair for pair in keys if pair not in found]
+        if missing:
+            self.count("misses", len(missing))
+            missing_origins = list(dict.fromkeys(origin for origin, _ in missing))
+            missing_destinations = list(dict.fromkeys(destination for _, destination in missing))
+
+            fetched = self.fetch_matrix(missing_origins, missing_destinations)
+            self.cache_set_many({keys[pair]: distance for pair, distance in fetched.items() if pair in keys})
+            found.update(fetched)
+
+        with self.lock:
+            for pair, distance in found.items():
+                self.local[keys[pair]] = distance
+
+        return [[found.get((origin, destination)) for destination in destinations] for origin in origins]
+
+
+    def fetch(self, origin, destination):
+        return self.fetch_matrix([origin], [destination]).get((origin, destination))
+
+
+    def fetch_matrix(self, origins, destinations):
+        distances = {}
+        destinations_per_request = min(MAX_MATRIX_SIDE, len(destinations))
+        origins_per_request = min(MAX_MATRIX_SIDE, MAX_MATRIX_ELEMENTS // destinations_per_request)
+
+        for i in range(0, len(origins), origins_per_request):
+            for j in range(0, len(destinations), destinations_per_request):
+                origin_chunk = origins[i:i + origins_per_request]
+                destination_chunk = destinations[j:j + destinations_per_request]
+
+                try:
+                    result = get_gmaps().distance_matrix(
+                        origins=origin_chunk, destinations=destination_chunk, mode="driving", units="metric"
+                    )
+                except Exception as e:
+                    self.count("errors")
+                    logger.error(f"Distance Matrix request failed for {origin_chunk} -> {destination_chunk}: {e}")
+                    continue
+
+                for origin, row in zip(origin_chunk, result.get("rows", [])):
+                    for destination, element in zip(destination_chunk, row.get("elements", [])):
+                        if element.get("status") != "OK":
+                            continue
+                        distance_meters = element["distance"]["value"]
+                        distances[(origin, destination)] = round(Decimal(distance_meters) / 1000, 2)
+
+        return distances
+
+
+road_distances = RoadDistanceProvider()
+
+
+def get_road_distance_km(origin, destination):
+    return road_distances.get_km(origin, destination)
+
+
+def get_road_distance_matrix_km(origins, destinations):
+    return road_distances.get_matrix_km(origins, destinations)
+
+
+def get_road_distances_km(lookups, deadline=None):
+    """
+    Resolve {name: (origin, destination)} concurrently and return {name: km}.
+    Lookups still running when the deadline passes come back as None.
+    """
+    deadline = deadline or settings.ROAD_DISTANCE_DEADLINE_SECONDS
+    futures = {
+        name: get_executor().submit(road_distances.get_km, origin, destination)
+        for name, (origin, destination) in lookups.items()
+    }
+    wait(futures.values(), timeout=deadline)
+
+    distances = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            logger.warning(f"Road distance lookup '{name}' missed the {deadline}s deadline")
+            distances[name] = None
+        elif future.exception():
+            logger.error(f"Road distance lookup '{name}' failed: {future.exception()}")
+            distances[name] = None
+        else:
+            distances[name] = future.result()
+    return distances
+
+
+
+def group_pairs(pairs):
+    """
+    Splits (origin, destination) pairs into (origins, destinations) blocks
+    that share an origin or a destination, largest first. Every pair in a
+    block was asked for, so no matrix element is paid for and thrown away.
+    """
+    by_origin, by_destination = defaultdict(set), defaultdict(set)
+    for origin, destination in pairs:
+        by_origin[origin].add(destination)
+        by_destination[destination].add(origin)
+
+    blocks = []
+    while by_origin:
+        origin, destinations = max(by_origin.items(), key=lambda item: len(item[1]))
+        destination, origins = max(by_destination.items(), key=lambda item: len(item[1]))
+        if len(destinations) >= len(origins):
+            origins, destinations = {origin}, set(destinations)
+        else:
+            origins, destinations = set(origins), {destination}
+        blocks.append((list(origins), list(destinations)))
+
+        for origin in origins:
+            by_origin[origin] -= destinations
+            if not by_origin[origin]:
+                del by_origin[origin]
+        for destination in destinations:
+            by_destination[destination] -= origins
+            if not by_destination[destination]:
+                del by_destination[destination]
+    return blocks
+
+
+def get_road_distance_pairs_km(pairs, deadline=None):
+    """
+    Resolve many (origin, destination) pairs with as few Distance Matrix
+    requests as grouping allows, run concurrently; returns {pair: km}.
+    Blocks still running when the deadline passes come back as None.
+    """
+    deadline = deadline or settings.ROAD_DISTANCE_DEADLINE_SECONDS
+    futures = {
+        get_executor().submit(road_distances.get_matrix_km, origins, destinations): (origins, destinations)
+        for origins, destinations in group_pairs(set(pairs))
+    }
+    wait(futures, timeout=deadline)
+
+    distances = {}
+    for future, (origins, destinations) in futures.items():
+        if not future.done():
+            future.cancel()
+            logger.warning(f"Road distance matrix for {len(origins)}x{len(destinations)} missed the {deadline}s deadline")
+            matrix = [[None] * len(destinations)] * len(origins)
+        elif future.exception():
+            logger.error(f"Road distance matrix failed: {future.exception()}")
+            matrix = [[None] * len(destinations)] * len(origins)
+        else:
+            matrix = future.result()
+        for origin, row in zip(origins, matrix):
+            distances.update({(origin, destination): km for destination, km in zip(destinations, row)})
+    return distances
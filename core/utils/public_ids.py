@@ -0,0 +1,107 @@
+import re
+import time
+import secrets
+from django.db import IntegrityError, transaction
+
+
+# Crockford base32: no I, L, O or U
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ALIASES = str.maketrans({"I": "1", "L": "1", "O": "0"})
+
+EPOCH = 1735689600  # 2025-01-01 UTC
+RANDOM_BITS = 35
+
+# IDs issued before this module: prefix and 8 random upper-case letters or digits, no check character
+LEGACY_BODY = re.compile(r"[A-Z0-9]{8}")
+
+
+class InvalidPublicID(ValueError):
+    pass
+
+
+
+def encode(value):
+    chars = []
+    while True:
+        value, remainder = divmod(value, 32)
+        chars.append(ALPHABET[remainder])
+        if not value:
+            return "".join(reversed(chars))
+
+
+def encode_fixed(value, length):
+    return encode(value).rjust(length, ALPHABET[0])
+
+
+def check_symbol(body):
+    """Luhn mod 32 check character; catches any single wrong character and most swaps."""
+    total, factor = 0, 2
+    for char in reversed(body):
+        addend = factor * ALPHABET.index(char)
+        total += addend // 32 + addend % 32
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[(32 - total % 32) % 32]
+
+
+def normalize(public_id, prefix):
+    """
+    Canonical form of a typed or scanned ID: upper case, without spaces or
+    hyphens, with Crockford's look-alikes (I, L, O) read as digits. Raises
+    InvalidPublicID when the prefix or the check character does not match.
+    """
+    text = str(public_id).upper().replace("-", "").replace(" ", "")
+    if not text.startswith(prefix) or len(text) < len(prefix) + 2:
+        raise InvalidPublicID(f"{public_id} is not a {prefix} ID")
+
+    body = text[len(prefix):].translate(ALIASES)
+    if any(char not in ALPHABET for char in body) or check_symbol(body[:-1]) != body[-1]:
+        raise InvalidPublicID(f"{public_id} failed its check character")
+
+    return prefix + body
+
+
+def is_legacy(public_id, prefix):
+    text = str(public_id).strip().upper()
+    return text.startswith(prefix) and bool(LEGACY_BODY.fullmatch(text[len(prefix):]))
+
+
+
+def new_public_id(prefix):
+    """
+    Prefix, seconds since EPOCH, RANDOM_BITS random bits and a check
+    character. The timestamp keeps new rows close together in the index;
+    the random part makes IDs impossible to guess from one another.
+    """
+    seconds = max(int(time.time()) - EPOCH, 0)
+    body = encode(seconds) + encode_fixed(secrets.randbits(RANDOM_BITS), RANDOM_BITS // 5)
+    return f"{prefix}{body}{check_symbol(body)}"
+
+
+def save_with_public_id(instance, field, prefix, save, *args, **kwargs):
+    """
+    Calls save(), first giving instance a public ID in field if it has none.
+    A clash on a fresh ID is retried once with a new one.
+    """
+    if getattr(instance, field):
+        return save(*args, **kwargs)
+
+    setattr(instance, field, new_public_id(prefix))
+    try:
+        with transaction.atomic():
+            return save(*args, **kwargs)
+    except IntegrityError:
+        setattr(instance, field, new_public_id(prefix))
+        return save(*args, **kwargs)
+
+
+def bulk_create_with_public_ids(model, objs, field, prefix, **kwargs):
+    """bulk_create with a fresh public ID on every object, retried once with new IDs on a clash."""
+    for obj in objs:
+        setattr(obj, field, new_public_id(prefix))
+    try:
+        with transaction.atomic():
+            return model.objects.bulk_create(objs, **kwargs)
+    except IntegrityError:
+        for obj in objs:
+            setattr(obj, field, new_public_id(prefix))
+        return model.objects.bulk_create(objs, **kwargs)
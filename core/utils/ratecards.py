@@ -0,0 +1,204 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from apps.corporate.models import CorporateRoute, CorporateRoutePricing
+from apps.deliveries.models import (
+    SizeCategory, IntraCityParcelPolicy, IntraCityPackagePricing,
+    InterCountyRoute, InterCountyWeightTier, LastMileDeliveryPolicy,
+)
+from apps.fullloads.models import VehicleType, DistanceBand, WeightTier, VehiclePricing
+from apps.international.models import InternationalPolicy
+from core.utils.indexes import VersionedIndex
+
+
+class IntervalTable:
+    """
+    Rows priced over closed [low, high] ranges, kept sorted by low. Where
+    ranges overlap the row with the lowest low wins, like ordering the
+    range filter by its lower bound.
+    """
+
+    def __init__(self, rows, low, high):
+        rows = [row for row in rows if low(row) is not None and high(row) is not None]
+        self.rows = sorted(rows, key=low)
+        self.lows = [low(row) for row in self.rows]
+        self.highs = [high(row) for row in self.rows]
+        self.max_highs = list(accumulate(self.highs, max))
+
+
+    def __len__(self):
+        return len(self.rows)
+
+
+    def matches(self, value):
+        # rows before first can't reach value, rows from last onwards start above it
+        first = bisect_left(self.max_highs, value)
+        last = bisect_right(self.lows, value)
+
+        for i in range(first, last):
+            if self.highs[i] >= value:
+                yield self.rows[i]
+
+
+    def find(self, value):
+        return next(self.matches(value), None)
+
+
+
+def group_by(rows, key):
+    groups = {}
+    for row in rows:
+        groups.setdefault(key(row), []).append(row)
+    return groups
+
+
+class RateCard:
+    """Every pricing table loaded once, so quotes can be priced without queries."""
+
+    def __init__(self):
+        size_categories = list(SizeCategory.objects.all())
+        self.size_categories = {c.name.lower(): c for c in size_categories}
+        self.size_categories_by_id = {c.id: c for c in size_categories}
+
+        # intra-city
+        self.parcel_policies = {p.office_id: p for p in IntraCityParcelPolicy.objects.all()}
+        package_pricing = list(IntraCityPackagePricing.objects.all())
+        self.package_pricing = {
+            office_id: self.package_table(rows)
+            for office_id, rows in group_by(package_pricing, lambda p: p.office_id).items()
+        }
+        self.any_package_pricing = self.package_table(package_pricing)
+        self.last_mile_policies = {p.office_id: p for p in LastMileDeliveryPolicy.objects.all()}
+
+        # inter-county
+        self.intercounty_routes = self.route_map()
+        self.intercounty_tiers = {
+            route_id: IntervalTable(rows, lambda t: t.min_weight, lambda t: t.max_weight)
+            for route_id, rows in group_by(InterCountyWeightTier.objects.all(), lambda t: t.route_id).items()
+        }
+
+        # full loads
+        self.vehicles = {v.id: v for v in VehicleType.objects.all()}
+        self.distance_bands = IntervalTable(DistanceBand.objects.all(), lambda b: b.min_km, lambda b: b.max_km)
+        self.weight_tiers = IntervalTable(WeightTier.objects.all(), lambda t: t.min_weight, lambda t: t.max_weight)
+        self.vehicle_rates = {(r.vehicle_id, r.band_id, r.weight_id): r for r in VehiclePricing.objects.all()}
+
+        # international
+        self.international_policies = {
+            city_id: IntervalTable(rows, lambda p: p.min_weight, lambda p: p.max_weight)
+            for city_id, rows in group_by(InternationalPolicy.objects.all(), lambda p: p.city_id).items()
+        }
+
+        # corporate
+        # reversed so the oldest route wins, like .first()
+        self.corporate_routes = {}
+        for route in CorporateRoute.objects.order_by("-id"):
+            self.corporate_routes[(route.origin_office_id, route.destination_office_id)] = route
+        self.corporate_tiers = {
+            route_id: IntervalTable(rows, lambda t: t.min_weight, lambda t: t.max_weight)
+            for route_id, rows in group_by(CorporateRoutePricing.objects.all(), lambda t: t.route_id).items()
+        }
+
+
+    @staticmethod
+    def route_map():
+        """(origin office, destination office, size category) -> route, lowest id first."""
+        origins = group_by(InterCountyRoute.origins.through.objects.values_list("intercountyroute_id", "office_id"), lambda r: r[0])
+        destinations = group_by(InterCountyRoute.destinations.through.objects.values_list("intercountyroute_id", "office_id"), lambda r: r[0])
+
+        routes = {}
+        for route in InterCountyRoute.objects.order_by("id"):
+            for _, origin_id in origins.get(route.id, []):
+                for _, destination_id in destinations.get(route.id, []):
+                    routes.setdefault((origin_id, destination_id, route.size_category_id), route)
+        return routes
+
+
+    @staticmethod
+    def package_table(rows):
+        # distance bands, each with its own weight table
+        bands = group_by(rows, lambda p: (p.min_distance, p.max_distance))
+        return IntervalTable(
+            [(low, high, IntervalTable(band, lambda p: p.min_weight, lambda p: p.max_weight)) for (low, high), band in bands.items()],
+            lambda band: band[0],
+            lambda band: band[1],
+        )
+
+
+    def size_category(self, name):
+        return self.size_categories.get(name.lower())
+
+
+    def size_category_by_id(self, size_category_id):
+        return self.size_categories_by_id.get(size_category_id)
+
+
+    def intracity_parcel_policy(self, office_id=None):
+        """The office's parcel policy, or the lowest-id one when office_id is None, like .first()."""
+        if office_id is None:
+            return min(self.parcel_policies.values(), key=lambda p: p.id, default=None)
+        return self.parcel_policies.get(office_id)
+
+
+    def intracity_package_pricing(self, weight, distance_km, office_id=None):
+        """Package pricing row for the office, or across all offices when office_id is None."""
+        table = self.any_package_pricing if office_id is None else self.package_pricing.get(office_id)
+        if table is None:
+            return None
+
+        for _, _, weights in table.matches(distance_km):
+            pricing = weights.find(weight)
+            if pricing:
+                return pricing
+        return None
+
+
+    def last_mile_policy(self, office_id):
+        return self.last_mile_policies.get(office_id)
+
+
+    def intercounty_route(self, origin_office_id, destination_office_id, size_category_id, bidirectional=True):
+        """Route priced for the pair, or None. A route priced in the given direction wins."""
+        route = self.intercounty_routes.get((origin_office_id, destination_office_id, size_category_id))
+        if route is None and bidirectional:
+            route = self.intercounty_routes.get((destination_office_id, origin_office_id, size_category_id))
+        return route
+
+
+    def intercounty_tier(self, route_id, weight):
+        tiers = self.intercounty_tiers.get(route_id)
+        return tiers.find(weight) if tiers else None
+
+
+    def vehicle(self, vehicle_id):
+        return self.vehicles.get(vehicle_id)
+
+
+    def distance_band(self, distance_km):
+        return self.distance_bands.find(distance_km)
+
+
+    def weight_tier(self, weight):
+        return self.weight_tiers.find(weight)
+
+
+    def vehicle_rate(self, vehicle_id, band_id, weight_tier_id):
+        return self.vehicle_rates.get((vehicle_id, band_id, weight_tier_id))
+
+
+    def international_policy(self, city_id, weight):
+        policies = self.international_policies.get(city_id)
+        return policies.find(weight) if policies else None
+
+
+    def corporate_route(self, origin_office_id, destination_office_id):
+        return self.corporate_routes.get((origin_office_id, destination_office_id))
+
+
+    def corporate_tier(self, route_id, weight):
+        tiers = self.corporate_tiers.get(route_id)
+        return tiers.find(weight) if tiers else None
+
+
+
+rate_cards = VersionedIndex("rate_cards", RateCard)
@@ -1,56 +1,77 @@
-import googlemaps
+import redis
+import logging
+import datetime
+from decimal import Decimal
 from django.conf import settings
-from geopy.distance import geodesic
 from apps.accounts.models import *
+from apps.drivers.positions import driver_positions
+from core.utils.geo import distances_km
+from core.utils.maps import get_road_distance_km
+from core.utils.spatial import get_nearest_office
 
 
-gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+logger = logging.getLogger(__name__)
 
 
-def get_nearest_office(coords):
-    offices = Office.objects.all()
+def get_nearby_drivers(pickup_coords, radius_km=5, limit=None):
+    positions = get_nearby_positions(pickup_coords, radius_km, limit=limit)
+    driver_ids = [driver_id for driver_id, _, _ in positions]
+    drivers = {str(user.id): user for user in User.objects.filter(id__in=driver_ids)}
+    return [drivers[driver_id] for driver_id in driver_ids if driver_id in drivers]
 
-    nearest = None
-    min_distance = float("inf")
-
-    for office in offices:
-        try:
-            distance = geodesic(coords, (float(office.geo_lat), float(office.geo_lng))).km
-            if distance < min_distance:
-                min_distance = distance
-                nearest = office
-        except Exception:
-            continue
-
-    return nearest
 
 
+def get_nearby_positions(pickup_coords, radius_km=5, limit=None):
+    """[(driver_id, distance_km, last_seen)] within radius_km, closest first."""
+    try:
+        positions = driver_positions.nearby(pickup_coords[0], pickup_coords[1], radius_km, limit=limit)
+        # an empty store has lost its data rather than its riders, until pings refill it
+        if positions or not driver_positions.is_empty():
+            return positions
+        logger.warning("Driver position store is empty, scanning DriverLocation")
+    except redis.RedisError as e:
+        logger.error(f"Driver position store unavailable, scanning DriverLocation: {e}")
+    return get_nearby_positions_from_db(pickup_coords, radius_km)[:limit]
+
+
+
+def get_nearby_positions_from_db(pickup_coords, radius_km=5):
+    locations = list(DriverLocation.objects.all())
+    if not locations:
+        return []
+
+    distances = distances_km(
+        pickup_coords, [(float(location.latitude), float(location.longitude)) for location in locations]
+    )
+
+    return sorted(
+        (
+            (str(location.driver_id), float(distance), location.updated_at.timestamp())
+            for location, distance in zip(locations, distances)
+            if distance <= radius_km
+        ),
+        key=lambda position: position[1],
+    )
+
+
+
+def get_rider_position(rider):
+    """
+    (lat, lng, updated_at) of a rider from the live position buffer, or
+    from the last flushed DriverLocation; None when neither has one.
+    """
+    try:
+        live = driver_positions.get(rider.id)
+    except redis.RedisError as e:
+        logger.error(f"Driver position store unavailable, reading DriverLocation: {e}")
+        live = None
 
+    if live:
+        lat, lng, last_seen = live
+        return Decimal(f"{lat:.6f}"), Decimal(f"{lng:.6f}"), datetime.datetime.fromtimestamp(last_seen, tz=datetime.timezone.utc)
 
-def get_road_distance_km(origin, destination):
-    result = gmaps.distance_matrix(origins=[origin], destinations=[destination], mode="driving")
     try:
-        distance_meters = result['rows'][0]['elements'][0]['distance']['value']  # meters
-        return round(Decimal(distance_meters) / 1000, 2)  # km
-    except Exception:
+        location = rider.location
+    except DriverLocation.DoesNotExist:
         return None
-
-
-
-def get_nearby_drivers(pickup_coords, radius_km=5):
-    nearby_drivers = []
-
-    for driver_location in DriverLocation.objects.select_related("driver"):
-        driver_coords = (float(driver_location.latitude), float(driver_location.longitude))
-        distance = geodesic(pickup_coords, driver_coords).km
-
-        if distance <= radius_km:
-            nearby_drivers.append(driver_location.driver)  # ✅ return driver instead of location
-
-    return nearby_drivers
-
-
-
-
-
-
+    return location.latitude, location.longitude, location.updated_at
@@ -0,0 +1,135 @@
+import math
+import numpy as np
+from apps.accounts.models import Office
+from core.utils.geo import EARTH_RADIUS_KM
+from core.utils.indexes import VersionedIndex
+
+
+def to_unit_vector(lat, lng):
+    lat, lng = math.radians(float(lat)), math.radians(float(lng))
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lng), cos_lat * math.sin(lng), math.sin(lat))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class KDTree:
+    """
+    3-d tree over points on the unit sphere. The straight-line (chord) distance
+    between two unit vectors grows with the great-circle distance, so the
+    nearest point by chord is also the nearest point on the ground.
+    """
+
+    def __init__(self, points):
+        self.points = [to_unit_vector(lat, lng) for lat, lng in points]
+        self.root = self._build(list(range(len(self.points))), 0)
+
+
+    def _build(self, indices, depth):
+        if not indices:
+            return None
+
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        mid = len(indices) // 2
+
+        return (
+            indices[mid],
+            axis,
+            self._build(indices[:mid], depth + 1),
+            self._build(indices[mid + 1:], depth + 1),
+        )
+
+
+    def nearest(self, lat, lng):
+        """Return (index, distance_km) of the closest point, or (None, None)."""
+        if self.root is None:
+            return None, None
+
+        target = to_unit_vector(lat, lng)
+        best_index, best_sq = None, float("inf")
+        stack = [self.root]
+
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+
+            index, axis, left, right = node
+            point = self.points[index]
+            dist_sq = sum((a - b) ** 2 for a, b in zip(point, target))
+            if dist_sq < best_sq:
+                best_index, best_sq = index, dist_sq
+
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+
+            # only cross the splitting plane if it is closer than the best hit
+            if diff * diff < best_sq:
+                stack.append(far)
+            stack.append(near)
+
+        return best_index, chord_to_km(math.sqrt(best_sq))
+
+
+
+class OfficeIndex:
+    def __init__(self, offices):
+        self.offices = [
+            office for office in offices
+            if office.geo_lat is not None and office.geo_lng is not None
+        ]
+        self.by_id = {office.id: office for office in self.offices}
+        self.tree = KDTree([(office.geo_lat, office.geo_lng) for office in self.offices])
+
+
+    def nearest(self, lat, lng):
+        index, distance_km = self.tree.nearest(lat, lng)
+        if index is None:
+            return None, None
+        return self.offices[index], distance_km
+
+
+    def nearest_many(self, points, chunk_size=4096):
+        """Nearest office for each (lat, lng): the largest dot product of unit vectors is the shortest chord."""
+        if not self.offices or not len(points):
+            return [None] * len(points)
+
+        lat, lng = np.radians(np.asarray(points, dtype=float).reshape(-1, 2)).T
+        targets = np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+        office_vectors = np.asarray(self.tree.points)
+
+        nearest = []
+        for start in range(0, len(targets), chunk_size):
+            nearest.extend(np.argmax(targets[start:start + chunk_size] @ office_vectors.T, axis=1))
+        return [self.offices[i] for i in nearest]
+
+
+
+office_index = VersionedIndex("offices", lambda: OfficeIndex(Office.objects.all()))
+
+
+def get_nearest_office(coords):
+    try:
+        lat, lng = float(coords[0]), float(coords[1])
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    office, _ = office_index.get().nearest(lat, lng)
+    return office
+
+
+def get_nearest_offices(coords_list):
+    """get_nearest_office for many points at once; None where a point can't be parsed."""
+    parsed = {}
+    for i, coords in enumerate(coords_list):
+        try:
+            parsed[i] = (float(coords[0]), float(coords[1]))
+        except (TypeError, ValueError, IndexError):
+            pass
+
+    offices = office_index.get().nearest_many(list(parsed.values()))
+    nearest = dict(zip(parsed, offices))
+    return [nearest.get(i) for i in range(len(coords_list))]